@@ -14,14 +14,17 @@ books = [
     book(id=2, title="To Kill a Mockingbird")
 ]
 
+books_by_id: dict[int, book] = {b.id: b for b in books}
+
 @app.get("/books")
 def list_books():
     return books
 
 @app.get("/books/{id}")
 def get_book(id: int):
-    for b in books:
-        if b.id == id:
-            return b
-    # raise HTTPException()
+    b = books_by_id.get(id)
+    if b is None:
+        raise HTTPException(404, "Book not found")
+    return b
+
 
@@ -1,9 +1,10 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Dict
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Session model
 class Session(BaseModel):
@@ -43,7 +44,7 @@ def update_session(session_id: int, session: Session):
 def patch_session(session_id: int, session: dict):
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
-    stored_session = sessions[session_id].dict()
+    stored_session = sessions[session_id].model_dump()
     updated_session = stored_session | session  # merge dicts
     sessions[session_id] = Session(**updated_session)
     return sessions[session_id]
@@ -1,18 +1,40 @@
 # main.py
 from fastapi import FastAPI, HTTPException, Depends, Request
-from pydantic import BaseModel
-from typing import Optional, List
-from sqlalchemy import create_engine, Column, Integer, String
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List, Union
+from sqlalchemy import Column, Integer, String, Row, select, update, delete, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession as DBSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session as DBSession
 import dataclasses
+import msgspec
+from msgspec import UNSET, UnsetType
+from msgspec_body import msgspec_body, msgspec_openapi
+from functools import partial
 import strawberry
+from strawberry.dataloader import DataLoader
 from strawberry.fastapi import GraphQLRouter
 
 # ---------- Database (SQLite) ----------
-DATABASE_URL = "sqlite:///./sessionql.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DATABASE_URL = "sqlite+aiosqlite:///./sessionql.db"
+
+engine = create_async_engine(DATABASE_URL)
+
+# SQLite tuning applied to every new connection: WAL lets readers run
+# alongside a writer and synchronous=NORMAL drops the per-commit double fsync
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+# expire_on_commit=False: created rows keep their INSERT ... RETURNING values after
+# commit, so no follow-up refresh() SELECT is needed
+SessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=engine, class_=DBSession)
 Base = declarative_base()
 
 class SessionDB(Base):
@@ -23,13 +45,21 @@ class SessionDB(Base):
     duration = Column(Integer, nullable=False)   # minutes
     location = Column(String, nullable=True)
 
-# create table(s)
-Base.metadata.create_all(bind=engine)
+# Column-only projection for list views: returns lightweight Row tuples
+# instead of hydrating full ORM objects
+SESSION_COLUMNS = (SessionDB.id, SessionDB.title, SessionDB.speaker, SessionDB.duration, SessionDB.location)
 
 # ---------- FastAPI app ----------
-app = FastAPI(title="Sessions REST + GraphQL example")
+app = FastAPI(title="Sessions REST + GraphQL example", default_response_class=ORJSONResponse)
+
+# create table(s) — the async engine can't run DDL at import time
+@app.on_event("startup")
+async def init_models():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
 
-# Middleware: attach a DB session to request.state (used by GraphQL context)
+# Middleware: attach a DB session to request.state (used by GraphQL context and REST);
+# it is the only place a session is opened/closed per request
 @app.middleware("http")
 async def db_session_middleware(request: Request, call_next):
     request.state.db = SessionLocal()
@@ -37,83 +67,108 @@ async def db_session_middleware(request: Request, call_next):
         response = await call_next(request)
         return response
     finally:
-        request.state.db.close()
+        await request.state.db.close()
 
-# REST dependency (for REST endpoints)
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# REST dependency (for REST endpoints) — reuses the middleware's session
+async def get_db(request: Request) -> DBSession:
+    return request.state.db
 
-# ---------- Pydantic models (REST) ----------
-class SessionCreate(BaseModel):
+# ---------- Request / response models (REST) ----------
+# request bodies are validated by msgspec, responses stay Pydantic
+class SessionCreate(msgspec.Struct):
     title: str
     speaker: str
     duration: int
     location: Optional[str] = None
 
-class SessionUpdate(BaseModel):
-    title: Optional[str] = None
-    speaker: Optional[str] = None
-    duration: Optional[int] = None
-    location: Optional[str] = None
+# UNSET marks fields the client left out, so PATCH only touches what was sent
+class SessionUpdate(msgspec.Struct):
+    title: Union[str, UnsetType] = UNSET
+    speaker: Union[str, UnsetType] = UNSET
+    duration: Union[int, UnsetType] = UNSET
+    location: Union[Optional[str], UnsetType] = UNSET
 
-class SessionResponse(SessionCreate):
+class SessionResponse(BaseModel):
     id: int
-    class Config:
-        orm_mode = True
+    title: str
+    speaker: str
+    duration: int
+    location: Optional[str] = None
+    # v2-native config: read straight from ORM objects/rows
+    model_config = ConfigDict(from_attributes=True)
 
 # ---------- REST endpoints ----------
-@app.post("/sessions/", response_model=SessionResponse)
-def create_session_rest(body: SessionCreate, db: DBSession = Depends(get_db)):
-    new = SessionDB(**body.dict())
+async def get_session_row(db: DBSession, session_id: int) -> Optional[SessionDB]:
+    result = await db.execute(select(SessionDB).where(SessionDB.id == session_id))
+    return result.scalar_one_or_none()
+
+async def update_session_row(db: DBSession, session_id: int, values: dict):
+    """Single UPDATE ... RETURNING round trip; returns None when the id doesn't exist."""
+    if not values:
+        stmt = select(*SESSION_COLUMNS).where(SessionDB.id == session_id)
+    else:
+        stmt = (
+            update(SessionDB)
+            .where(SessionDB.id == session_id)
+            .values(**values)
+            .returning(*SESSION_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+    row = (await db.execute(stmt)).first()
+    await db.commit()
+    return row
+
+async def delete_session_row(db: DBSession, session_id: int) -> bool:
+    """Single DELETE ... RETURNING round trip; False when the id doesn't exist."""
+    stmt = (
+        delete(SessionDB)
+        .where(SessionDB.id == session_id)
+        .returning(SessionDB.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = (await db.execute(stmt)).first()
+    await db.commit()
+    return deleted is not None
+
+@app.post("/sessions/", response_model=SessionResponse, openapi_extra=msgspec_openapi(SessionCreate))
+async def create_session_rest(body: SessionCreate = Depends(msgspec_body(SessionCreate)), db: DBSession = Depends(get_db)):
+    new = SessionDB(**msgspec.structs.asdict(body))
     db.add(new)
-    db.commit()
-    db.refresh(new)
+    await db.commit()
     return new
 
 @app.get("/sessions/{session_id}", response_model=SessionResponse)
-def get_session_rest(session_id: int, db: DBSession = Depends(get_db)):
-    s = db.query(SessionDB).filter(SessionDB.id == session_id).first()
+async def get_session_rest(session_id: int, db: DBSession = Depends(get_db)):
+    s = await get_session_row(db, session_id)
     if not s:
         raise HTTPException(status_code=404, detail="Session not found")
     return s
 
+# rows come straight from our own table, so skip response_model re-validation
+# (validation only happens on ingress)
 @app.get("/sessions/", response_model=List[SessionResponse])
-def list_sessions_rest(db: DBSession = Depends(get_db)):
-    return db.query(SessionDB).all()
+async def list_sessions_rest(db: DBSession = Depends(get_db)):
+    rows = (await db.execute(select(*SESSION_COLUMNS))).all()
+    return ORJSONResponse([r._asdict() for r in rows])
 
-@app.put("/sessions/{session_id}", response_model=SessionResponse)
-def update_session_rest(session_id: int, body: SessionCreate, db: DBSession = Depends(get_db)):
-    s = db.query(SessionDB).filter(SessionDB.id == session_id).first()
-    if not s:
+@app.put("/sessions/{session_id}", response_model=SessionResponse, openapi_extra=msgspec_openapi(SessionCreate))
+async def update_session_rest(session_id: int, body: SessionCreate = Depends(msgspec_body(SessionCreate)), db: DBSession = Depends(get_db)):
+    row = await update_session_row(db, session_id, msgspec.structs.asdict(body))
+    if row is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    for k, v in body.dict().items():
-        setattr(s, k, v)
-    db.commit()
-    db.refresh(s)
-    return s
+    return row._asdict()
 
-@app.patch("/sessions/{session_id}", response_model=SessionResponse)
-def patch_session_rest(session_id: int, body: SessionUpdate, db: DBSession = Depends(get_db)):
-    s = db.query(SessionDB).filter(SessionDB.id == session_id).first()
-    if not s:
+@app.patch("/sessions/{session_id}", response_model=SessionResponse, openapi_extra=msgspec_openapi(SessionUpdate))
+async def patch_session_rest(session_id: int, body: SessionUpdate = Depends(msgspec_body(SessionUpdate)), db: DBSession = Depends(get_db)):
+    row = await update_session_row(db, session_id, msgspec.to_builtins(body))  # UNSET fields are omitted
+    if row is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    for k, v in body.dict(exclude_unset=True).items():
-        setattr(s, k, v)
-    db.commit()
-    db.refresh(s)
-    return s
+    return row._asdict()
 
 @app.delete("/sessions/{session_id}")
-def delete_session_rest(session_id: int, db: DBSession = Depends(get_db)):
-    s = db.query(SessionDB).filter(SessionDB.id == session_id).first()
-    if not s:
+async def delete_session_rest(session_id: int, db: DBSession = Depends(get_db)):
+    if not await delete_session_row(db, session_id):
         raise HTTPException(status_code=404, detail="Session not found")
-    db.delete(s)
-    db.commit()
     return {"detail": "deleted"}
 
 # ---------- GraphQL types & helpers ----------
@@ -139,7 +194,8 @@ class SessionPatchInput:
     duration: Optional[int] = None
     location: Optional[str] = None
 
-def dbmodel_to_type(s: SessionDB) -> SessionType:
+# accepts a SessionDB object or a SESSION_COLUMNS row
+def dbmodel_to_type(s: Union[SessionDB, Row]) -> SessionType:
     return SessionType(
         id=s.id,
         title=s.title,
@@ -152,89 +208,85 @@ def dbmodel_to_type(s: SessionDB) -> SessionType:
 @strawberry.type
 class Query:
     @strawberry.field
-    def session(self, info, id: int) -> Optional[SessionType]:
-        db: DBSession = info.context["db"]
-        s = db.query(SessionDB).filter(SessionDB.id == id).first()
-        if not s:
+    async def session(self, info, id: int) -> Optional[SessionType]:
+        # sibling session(id:) fields in one operation share a single IN query
+        row = await info.context["session_loader"].load(id)
+        if row is None:
             return None
-        return dbmodel_to_type(s)
+        return dbmodel_to_type(row)
 
     @strawberry.field
-    def sessions(self, info) -> List[SessionType]:
+    async def sessions(self, info) -> List[SessionType]:
         db: DBSession = info.context["db"]
-        rows = db.query(SessionDB).all()
+        rows = (await db.execute(select(*SESSION_COLUMNS))).all()
         return [dbmodel_to_type(r) for r in rows]
 
 # GraphQL Mutations
 @strawberry.type
 class Mutation:
     @strawberry.mutation(name="createSession")
-    def create_session(self, info, input: SessionCreateInput) -> SessionType:
+    async def create_session(self, info, input: SessionCreateInput) -> SessionType:
         db: DBSession = info.context["db"]
         payload = dataclasses.asdict(input)
         new = SessionDB(**payload)
         db.add(new)
-        db.commit()
-        db.refresh(new)
+        await db.commit()
         return dbmodel_to_type(new)
 
     @strawberry.mutation(name="updateSession")
-    def update_session(self, info, id: int, input: SessionCreateInput) -> SessionType:
+    async def update_session(self, info, id: int, input: SessionCreateInput) -> SessionType:
         db: DBSession = info.context["db"]
-        s = db.query(SessionDB).filter(SessionDB.id == id).first()
-        if not s:
+        row = await update_session_row(db, id, dataclasses.asdict(input))
+        if row is None:
             raise Exception("Session not found")
-        for k, v in dataclasses.asdict(input).items():
-            setattr(s, k, v)
-        db.commit()
-        db.refresh(s)
-        return dbmodel_to_type(s)
+        return dbmodel_to_type(row)
 
     @strawberry.mutation(name="patchSession")
-    def patch_session(self, info, id: int, input: SessionPatchInput) -> SessionType:
+    async def patch_session(self, info, id: int, input: SessionPatchInput) -> SessionType:
         db: DBSession = info.context["db"]
-        s = db.query(SessionDB).filter(SessionDB.id == id).first()
-        if not s:
+        # treat `None` as "not provided" (do not overwrite) — if you want to explicitly set NULL,
+        # you'd need a different pattern to distinguish "omitted" vs "null".
+        values = {k: v for k, v in dataclasses.asdict(input).items() if v is not None}
+        row = await update_session_row(db, id, values)
+        if row is None:
             raise Exception("Session not found")
-        for k, v in dataclasses.asdict(input).items():
-            # treat `None` as "not provided" (do not overwrite) — if you want to explicitly set NULL,
-            # you'd need a different pattern to distinguish "omitted" vs "null".
-            if v is not None:
-                setattr(s, k, v)
-        db.commit()
-        db.refresh(s)
-        return dbmodel_to_type(s)
+        return dbmodel_to_type(row)
 
     @strawberry.mutation(name="deleteSession")
-    def delete_session(self, info, id: int) -> bool:
+    async def delete_session(self, info, id: int) -> bool:
         db: DBSession = info.context["db"]
-        s = db.query(SessionDB).filter(SessionDB.id == id).first()
-        if not s:
-            return False
-        db.delete(s)
-        db.commit()
-        return True
+        return await delete_session_row(db, id)
         
     @strawberry.mutation(name="createSessions")
-    def create_sessions(self, info, inputs: List[SessionCreateInput]) -> List[SessionType]:
+    async def create_sessions(self, info, inputs: List[SessionCreateInput]) -> List[SessionType]:
         db: DBSession = info.context["db"]
-        created = []
-        for inp in inputs:
-            payload = dataclasses.asdict(inp)
-            new = SessionDB(**payload)
-            db.add(new)
-            db.commit()
-            db.refresh(new)
-            created.append(dbmodel_to_type(new))
+        # one transaction for the whole batch; flush fills in the primary keys
+        objs = [SessionDB(**dataclasses.asdict(inp)) for inp in inputs]
+        db.add_all(objs)
+        await db.flush()
+        created = [dbmodel_to_type(o) for o in objs]
+        await db.commit()
         return created
 
 
 # ---------- GraphQL app & wiring ----------
 schema = strawberry.Schema(query=Query, mutation=Mutation)
 
-# context_getter uses the DB session created in the middleware (request.state.db)
+async def load_sessions(db: DBSession, ids: List[int]) -> List[Optional[Row]]:
+    """DataLoader batch fn: one SELECT ... WHERE id IN (...) for all requested ids."""
+    rows = (await db.execute(select(*SESSION_COLUMNS).where(SessionDB.id.in_(ids)))).all()
+    by_id = {r.id: r for r in rows}
+    return [by_id.get(i) for i in ids]
+
+# context_getter uses the DB session created in the middleware (request.state.db);
+# loaders are per request so their cache never outlives the session
 async def get_context(request: Request):
-    return {"request": request, "db": request.state.db}
+    db = request.state.db
+    return {
+        "request": request,
+        "db": db,
+        "session_loader": DataLoader(load_fn=partial(load_sessions, db)),
+    }
 
 graphql_router = GraphQLRouter(schema, graphiql=True, context_getter=get_context)
 app.include_router(graphql_router, prefix="/graphql")
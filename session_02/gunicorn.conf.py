@@ -0,0 +1,14 @@
+# Production launcher settings, picked up automatically by:
+#   gunicorn graphql_api:app      (or index:app)
+# Needs: pip install gunicorn "uvicorn[standard]"
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# one Uvicorn event loop per core; UvicornWorker uses uvloop + httptools
+# automatically when uvicorn[standard] is installed (loop/http = "auto")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+# import the app once in the master and fork it into the workers
+preload_app = True
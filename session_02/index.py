@@ -1,14 +1,33 @@
 from fastapi import FastAPI, HTTPException, Depends
-from pydantic import BaseModel
-from typing import List, Optional
-from sqlalchemy import create_engine, Column, Integer, String
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional, Union
+import msgspec
+from msgspec import UNSET, UnsetType
+from msgspec_body import msgspec_body, msgspec_openapi
+from sqlalchemy import Column, Integer, String, select, update, delete, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
 
 # Database setup (SQLite for demo)
-DATABASE_URL = "sqlite:///./sessio.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DATABASE_URL = "sqlite+aiosqlite:///./sessio.db"
+engine = create_async_engine(DATABASE_URL)
+
+# SQLite tuning applied to every new connection: WAL lets readers run
+# alongside a writer and synchronous=NORMAL drops the per-commit double fsync
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+# expire_on_commit=False: created rows keep their INSERT ... RETURNING values after
+# commit, so no follow-up refresh() SELECT is needed
+SessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=engine, class_=AsyncSession)
 
 Base = declarative_base()
 
@@ -22,93 +41,122 @@ class SessionDB(Base):
     duration = Column(Integer, nullable=False)  # minutes
     location = Column(String, nullable=True)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Column-only projection for list views: returns lightweight Row tuples
+# instead of hydrating full ORM objects
+SESSION_COLUMNS = (SessionDB.id, SessionDB.title, SessionDB.speaker, SessionDB.duration, SessionDB.location)
 
-# Pydantic Schemas
-class SessionCreate(BaseModel):
+# Schemas: request bodies are validated by msgspec, responses stay Pydantic
+class SessionCreate(msgspec.Struct):
     title: str
     speaker: str
     duration: int
     location: Optional[str] = None
 
-class SessionUpdate(BaseModel):
-    title: Optional[str] = None
-    speaker: Optional[str] = None
-    duration: Optional[int] = None
-    location: Optional[str] = None
+# UNSET marks fields the client left out, so PATCH only touches what was sent
+class SessionUpdate(msgspec.Struct):
+    title: Union[str, UnsetType] = UNSET
+    speaker: Union[str, UnsetType] = UNSET
+    duration: Union[int, UnsetType] = UNSET
+    location: Union[Optional[str], UnsetType] = UNSET
 
-class SessionResponse(SessionCreate):
+class SessionResponse(BaseModel):
     id: int
+    title: str
+    speaker: str
+    duration: int
+    location: Optional[str] = None
 
-    class Config:
-        orm_mode = True
+    # v2-native config: read straight from ORM objects/rows
+    model_config = ConfigDict(from_attributes=True)
 
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+async def get_session_row(db: AsyncSession, session_id: int) -> Optional[SessionDB]:
+    result = await db.execute(select(SessionDB).where(SessionDB.id == session_id))
+    return result.scalar_one_or_none()
+
+async def update_session_row(db: AsyncSession, session_id: int, values: dict):
+    """Single UPDATE ... RETURNING round trip; returns None when the id doesn't exist."""
+    if not values:
+        stmt = select(*SESSION_COLUMNS).where(SessionDB.id == session_id)
+    else:
+        stmt = (
+            update(SessionDB)
+            .where(SessionDB.id == session_id)
+            .values(**values)
+            .returning(*SESSION_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+    row = (await db.execute(stmt)).first()
+    await db.commit()
+    return row
+
+async def delete_session_row(db: AsyncSession, session_id: int) -> bool:
+    """Single DELETE ... RETURNING round trip; False when the id doesn't exist."""
+    stmt = (
+        delete(SessionDB)
+        .where(SessionDB.id == session_id)
+        .returning(SessionDB.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = (await db.execute(stmt)).first()
+    await db.commit()
+    return deleted is not None
 
 # FastAPI app
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+
+# Create tables (the async engine can't run DDL at import time)
+@app.on_event("startup")
+async def init_models():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
 
 # POST - Create Session
-@app.post("/sessions/", response_model=SessionResponse)
-def create_session(session: SessionCreate, db: Session = Depends(get_db)):
-    new_session = SessionDB(**session.dict())
+@app.post("/sessions/", response_model=SessionResponse, openapi_extra=msgspec_openapi(SessionCreate))
+async def create_session(session: SessionCreate = Depends(msgspec_body(SessionCreate)), db: AsyncSession = Depends(get_db)):
+    new_session = SessionDB(**msgspec.structs.asdict(session))
     db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
+    await db.commit()
     return new_session
 
 # GET - Retrieve Session
 @app.get("/sessions/{session_id}", response_model=SessionResponse)
-def get_session(session_id: int, db: Session = Depends(get_db)):
-    session = db.query(SessionDB).filter(SessionDB.id == session_id).first()
+async def get_session(session_id: int, db: AsyncSession = Depends(get_db)):
+    session = await get_session_row(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     return session
 
 # GET ALL - List Sessions
+# Trusted DB rows: skip response_model re-validation
 @app.get("/sessions/", response_model=List[SessionResponse])
-def list_sessions(db: Session = Depends(get_db)):
-    return db.query(SessionDB).all()
+async def list_sessions(db: AsyncSession = Depends(get_db)):
+    rows = (await db.execute(select(*SESSION_COLUMNS))).all()
+    return ORJSONResponse([r._asdict() for r in rows])
 
 # PUT - Full Update
-@app.put("/sessions/{session_id}", response_model=SessionResponse)
-def update_session(session_id: int, session: SessionCreate, db: Session = Depends(get_db)):
-    db_session = db.query(SessionDB).filter(SessionDB.id == session_id).first()
-    if not db_session:
+@app.put("/sessions/{session_id}", response_model=SessionResponse, openapi_extra=msgspec_openapi(SessionCreate))
+async def update_session(session_id: int, session: SessionCreate = Depends(msgspec_body(SessionCreate)), db: AsyncSession = Depends(get_db)):
+    row = await update_session_row(db, session_id, msgspec.structs.asdict(session))
+    if row is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    for key, value in session.dict().items():
-        setattr(db_session, key, value)
-    db.commit()
-    db.refresh(db_session)
-    return db_session
+    return row._asdict()
 
 # PATCH - Partial Update
-@app.patch("/sessions/{session_id}", response_model=SessionResponse)
-def patch_session(session_id: int, session: SessionUpdate, db: Session = Depends(get_db)):
-    db_session = db.query(SessionDB).filter(SessionDB.id == session_id).first()
-    if not db_session:
+@app.patch("/sessions/{session_id}", response_model=SessionResponse, openapi_extra=msgspec_openapi(SessionUpdate))
+async def patch_session(session_id: int, session: SessionUpdate = Depends(msgspec_body(SessionUpdate)), db: AsyncSession = Depends(get_db)):
+    row = await update_session_row(db, session_id, msgspec.to_builtins(session))  # UNSET fields are omitted
+    if row is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    for key, value in session.dict(exclude_unset=True).items():
-        setattr(db_session, key, value)
-    db.commit()
-    db.refresh(db_session)
-    return db_session
+    return row._asdict()
 
 # DELETE - Remove Session
 @app.delete("/sessions/{session_id}")
-def delete_session(session_id: int, db: Session = Depends(get_db)):
-    db_session = db.query(SessionDB).filter(SessionDB.id == session_id).first()
-    if not db_session:
+async def delete_session(session_id: int, db: AsyncSession = Depends(get_db)):
+    if not await delete_session_row(db, session_id):
         raise HTTPException(status_code=404, detail="Session not found")
-    db.delete(db_session)
-    db.commit()
     return {"detail": "Session deleted"}
-
-
@@ -22,14 +22,27 @@
 # Keep it clean, commented, and idiomatic.
 
 from __future__ import annotations
-from typing import Optional, List, AsyncGenerator, Dict, Any
-from datetime import datetime
+from typing import Optional, List, AsyncGenerator, Dict, Any, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timezone
 import asyncio
-
-from fastapi import FastAPI
+import functools
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from fastapi import Body, Depends, FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from strawberry.dataloader import DataLoader
 from strawberry.fastapi import GraphQLRouter
+from strawberry.http import process_result
+import orjson
 import strawberry
 
+from sqlalchemy import case, event, lambda_stmt, update
 from sqlmodel import SQLModel, Field, create_engine, Session, select
 
 # ---------------------------
@@ -37,7 +50,28 @@ from sqlmodel import SQLModel, Field, create_engine, Session, select
 # ---------------------------
 
 DB_URL = "sqlite:///./ecom.db"
-engine = create_engine(DB_URL, echo=False, connect_args={"check_same_thread": False})
+engine = create_engine(
+    DB_URL,
+    echo=False,
+    connect_args={"check_same_thread": False, "timeout": 30},
+    query_cache_size=1200,
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+)
+
+# Keep a sized pool of warm connections and tune each one for concurrent access:
+# WAL lets readers run alongside the single writer, busy_timeout waits on locks
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.close()
 
 class Product(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -73,27 +107,71 @@ class OrderItem(SQLModel, table=True):
 def init_db():
     SQLModel.metadata.create_all(engine)
 
+def get_session() -> Iterator[Session]:
+    """FastAPI dependency: one Session per GraphQL request, closed after the response.
+
+    expire_on_commit=False keeps committed objects loaded, so mutations can build
+    their response from them without a refresh() SELECT.
+    """
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+
 # ---------------------------
 # Simple PubSub (in-memory)
 # ---------------------------
 
+class Topic:
+    """One shared ring buffer per topic; each subscriber keeps its own cursor into it."""
+
+    def __init__(self, maxlen: int = 1024) -> None:
+        self.buf: deque = deque(maxlen=maxlen)
+        self.seq = 0  # number of messages ever published
+        self.cond = asyncio.Condition()
+        self.subscribers = 0
+
 class EventBus:
+    # publish is O(1) regardless of subscriber count: one append + notify_all.
+    # A subscriber that falls more than maxlen messages behind skips the oldest.
     def __init__(self) -> None:
-        self._topics: Dict[str, List[asyncio.Queue]] = {}
+        self._topics: Dict[str, Topic] = {}
+        self.dropped = 0  # messages skipped by subscribers that fell behind
 
     async def publish(self, topic: str, payload: Any) -> None:
-        for q in self._topics.get(topic, []):
-            await q.put(payload)
+        await self.publish_many((topic,), payload)
+
+    async def publish_many(self, topics: Sequence[str], payload: Any) -> None:
+        """Deliver one payload to several topics in a single call."""
+        for name in topics:
+            t = self._topics.get(name)
+            if t is None:
+                continue
+            async with t.cond:
+                t.buf.append(payload)
+                t.seq += 1
+                t.cond.notify_all()
 
     async def subscribe(self, topic: str) -> AsyncGenerator[Any, None]:
-        q: asyncio.Queue = asyncio.Queue()
-        self._topics.setdefault(topic, []).append(q)
+        t = self._topics.get(topic)
+        if t is None:
+            t = self._topics[topic] = Topic()
+        t.subscribers += 1
+        cursor = t.seq
         try:
             while True:
-                item = await q.get()
-                yield item
+                async with t.cond:
+                    await t.cond.wait_for(lambda: t.seq != cursor)
+                    missed = t.seq - cursor
+                    if missed > len(t.buf):
+                        self.dropped += missed - len(t.buf)
+                        missed = len(t.buf)
+                    items = list(itertools.islice(t.buf, len(t.buf) - missed, None))
+                    cursor = t.seq
+                for item in items:
+                    yield item
         finally:
-            self._topics[topic].remove(q)
+            t.subscribers -= 1
+            if not t.subscribers and self._topics.get(topic) is t:
+                del self._topics[topic]
 
 bus = EventBus()
 
@@ -111,7 +189,19 @@ def topic_order_updated(order_id: int | None = None) -> str:
 def iso(dt: datetime) -> str:
     return dt.replace(microsecond=0).isoformat() + "Z"
 
+# iso() has second resolution, so "now" only needs formatting once per second
+@functools.lru_cache(maxsize=1)
+def _iso_for_second(second: int) -> str:
+    # formatted from the key itself, so the cached string always matches it
+    return iso(datetime.fromtimestamp(second, timezone.utc).replace(tzinfo=None))
+
+def iso_now() -> str:
+    return _iso_for_second(int(time.time()))
+
+# Plain output types are slotted (no per-instance __dict__); types with
+# resolver methods can't be, as dataclass would treat those as fields
 @strawberry.type
+@dataclass(slots=True)
 class ProductType:
     id: int
     title: str
@@ -122,6 +212,7 @@ class ProductType:
     updated_at: str
 
 @strawberry.type
+@dataclass(slots=True)
 class CustomerType:
     id: int
     name: str
@@ -136,6 +227,10 @@ class OrderItemType:
     unit_price_cents: int
     subtotal_cents: int
 
+    @strawberry.field
+    async def product(self, info) -> Optional[ProductType]:
+        return await info.context["product_loader"].load(self.product_id)
+
 @strawberry.type
 class OrderType:
     id: int
@@ -144,9 +239,15 @@ class OrderType:
     total_cents: int
     created_at: str
     updated_at: str
-    items: List[OrderItemType]
+
+    # Nested fields go through the per-request loaders (see get_context), so every
+    # order in one response shares a single IN query for its items
+    @strawberry.field
+    async def items(self, info) -> List[OrderItemType]:
+        return await info.context["item_loader"].load(self.id)
 
 @strawberry.type
+@dataclass(slots=True)
 class OrderEventType:
     order_id: int
     status: str
@@ -181,6 +282,17 @@ class OrderItemInput:
 # Mappers (DB -> GraphQL)
 # ---------------------------
 
+# Resolver convention: DB-backed resolvers are declared as plain sync functions
+# and wrapped with @in_threadpool (below @strawberry.field/@strawberry.mutation).
+# Strawberry then sees an async resolver and the blocking SQLite work runs on
+# the threadpool, so concurrent GraphQL requests don't serialize on the loop.
+def in_threadpool(fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_in_threadpool(fn, *args, **kwargs)
+    return wrapper
+
+
 def to_product_type(p: Product) -> ProductType:
     return ProductType(
         id=p.id, title=p.title, description=p.description,
@@ -197,14 +309,58 @@ def to_order_item_type(oi: OrderItem) -> OrderItemType:
         unit_price_cents=oi.unit_price_cents, subtotal_cents=oi.subtotal_cents
     )
 
-def to_order_type(session: Session, o: Order) -> OrderType:
-    items = session.exec(select(OrderItem).where(OrderItem.order_id == o.id)).all()
+def load_order_items(session: Session, order_ids: List[int]) -> Dict[int, List[OrderItem]]:
+    """Fetch the items of many orders with a single IN query, grouped by order_id."""
+    by_order: Dict[int, List[OrderItem]] = {oid: [] for oid in order_ids}
+    if order_ids:
+        stmt = select(OrderItem).where(OrderItem.order_id.in_(order_ids)).order_by(OrderItem.id)
+        for oi in session.exec(stmt).all():
+            by_order[oi.order_id].append(oi)
+    return by_order
+
+def to_order_type(o: Order) -> OrderType:
     return OrderType(
         id=o.id, customer_id=o.customer_id, status=o.status, total_cents=o.total_cents,
-        created_at=iso(o.created_at), updated_at=iso(o.updated_at),
-        items=[to_order_item_type(oi) for oi in items]
+        created_at=iso(o.created_at), updated_at=iso(o.updated_at)
     )
 
+# ---------------------------
+# DataLoaders (batched per request)
+# ---------------------------
+
+@contextmanager
+def request_session(ctx: Dict[str, Any]) -> Iterator[Session]:
+    """The request's shared Session. Sibling resolvers run concurrently on
+    threadpool workers, so the lock gives each of them exclusive use of it.
+    A resolver that raises has its pending changes rolled back, so a later
+    commit in the same request can't persist them."""
+    with ctx["session_lock"]:
+        session = ctx["session"]
+        try:
+            yield session
+        except BaseException:
+            session.rollback()
+            raise
+
+@in_threadpool
+def load_items(ctx: Dict[str, Any], order_ids: List[int]) -> List[List[OrderItemType]]:
+    with request_session(ctx) as session:
+        by_order = load_order_items(session, order_ids)
+        return [[to_order_item_type(oi) for oi in by_order[oid]] for oid in order_ids]
+
+@in_threadpool
+def load_products(ctx: Dict[str, Any], product_ids: List[int]) -> List[Optional[ProductType]]:
+    with request_session(ctx) as session:
+        rows = session.exec(select(Product).where(Product.id.in_(product_ids))).all()
+        by_id = {p.id: to_product_type(p) for p in rows}
+        return [by_id.get(pid) for pid in product_ids]
+
+async def get_context(session: Session = Depends(get_session)) -> Dict[str, Any]:
+    ctx: Dict[str, Any] = {"session": session, "session_lock": threading.Lock()}
+    ctx["item_loader"] = DataLoader(load_fn=functools.partial(load_items, ctx))
+    ctx["product_loader"] = DataLoader(load_fn=functools.partial(load_products, ctx))
+    return ctx
+
 # ---------------------------
 # GraphQL Root: Query
 # ---------------------------
@@ -212,174 +368,213 @@ def to_order_type(session: Session, o: Order) -> OrderType:
 @strawberry.type
 class Query:
     @strawberry.field
-    def products(self, search: Optional[str] = None, in_stock: Optional[bool] = None,
+    @in_threadpool
+    def products(self, info, search: Optional[str] = None, in_stock: Optional[bool] = None,
                  limit: int = 20, offset: int = 0) -> List[ProductType]:
-        with Session(engine) as session:
-            stmt = select(Product)
-            if search:
-                like = f"%{search}%"
-                stmt = stmt.where((Product.title.ilike(like)) | (Product.description.ilike(like)))
-            if in_stock is True:
-                stmt = stmt.where(Product.stock > 0)
-            stmt = stmt.order_by(Product.id.desc()).offset(offset).limit(min(limit, 100))
-            rows = session.exec(stmt).all()
+        # lambda statements are cached by the lambdas' code, so repeat calls skip
+        # rebuilding and re-compiling the SELECT; closure values become bind params
+        limit = min(limit, 100)
+        stmt = lambda_stmt(lambda: select(Product))
+        if search:
+            like = f"%{search}%"
+            stmt += lambda s: s.where((Product.title.ilike(like)) | (Product.description.ilike(like)))
+        if in_stock is True:
+            stmt += lambda s: s.where(Product.stock > 0)
+        stmt += lambda s: s.order_by(Product.id.desc()).offset(offset).limit(limit)
+        with request_session(info.context) as session:
+            rows = session.scalars(stmt).all()
             return [to_product_type(p) for p in rows]
 
     @strawberry.field
-    def product(self, id: int) -> Optional[ProductType]:
-        with Session(engine) as session:
+    @in_threadpool
+    def product(self, info, id: int) -> Optional[ProductType]:
+        with request_session(info.context) as session:
             p = session.get(Product, id)
             return to_product_type(p) if p else None
 
     @strawberry.field
-    def customers(self, limit: int = 20, offset: int = 0) -> List[CustomerType]:
-        with Session(engine) as session:
-            stmt = select(Customer).order_by(Customer.id.desc()).offset(offset).limit(min(limit, 100))
-            rows = session.exec(stmt).all()
+    @in_threadpool
+    def customers(self, info, limit: int = 20, offset: int = 0) -> List[CustomerType]:
+        limit = min(limit, 100)
+        stmt = lambda_stmt(lambda: select(Customer).order_by(Customer.id.desc()).offset(offset).limit(limit))
+        with request_session(info.context) as session:
+            rows = session.scalars(stmt).all()
             return [to_customer_type(c) for c in rows]
 
     @strawberry.field
-    def orders(self, customer_id: Optional[int] = None, status: Optional[str] = None,
+    @in_threadpool
+    def orders(self, info, customer_id: Optional[int] = None, status: Optional[str] = None,
                limit: int = 20, offset: int = 0) -> List[OrderType]:
-        with Session(engine) as session:
-            stmt = select(Order)
-            if customer_id:
-                stmt = stmt.where(Order.customer_id == customer_id)
-            if status:
-                stmt = stmt.where(Order.status == status)
-            stmt = stmt.order_by(Order.id.desc()).offset(offset).limit(min(limit, 100))
-            rows = session.exec(stmt).all()
-            return [to_order_type(session, o) for o in rows]
+        limit = min(limit, 100)
+        stmt = lambda_stmt(lambda: select(Order))
+        if customer_id:
+            stmt += lambda s: s.where(Order.customer_id == customer_id)
+        if status:
+            stmt += lambda s: s.where(Order.status == status)
+        stmt += lambda s: s.order_by(Order.id.desc()).offset(offset).limit(limit)
+        with request_session(info.context) as session:
+            rows = session.scalars(stmt).all()
+            return [to_order_type(o) for o in rows]
 
     @strawberry.field
-    def order(self, id: int) -> Optional[OrderType]:
-        with Session(engine) as session:
+    @in_threadpool
+    def order(self, info, id: int) -> Optional[OrderType]:
+        with request_session(info.context) as session:
             o = session.get(Order, id)
-            return to_order_type(session, o) if o else None
+            if not o:
+                return None
+            return to_order_type(o)
 
 # ---------------------------
 # GraphQL Root: Mutation
 # ---------------------------
 
-VALID_STATUSES = {"pending", "paid", "shipped", "delivered", "cancelled"}
+VALID_STATUSES = frozenset({"pending", "paid", "shipped", "delivered", "cancelled"})
+INVALID_STATUS_MSG = f"invalid status. valid: {sorted(VALID_STATUSES)}"
+
+# The order mutations await the event publish, so they are async themselves;
+# their SQLite transactions go through these threadpool helpers instead
+@in_threadpool
+def write_order(ctx: Dict[str, Any], customer_id: int, items: List[OrderItemInput], now: datetime) -> OrderType:
+    """place_order's transaction: validates the items, inserts the order and its
+    items and decrements stock."""
+    with request_session(ctx) as session:
+        customer = session.get(Customer, customer_id)
+        if not customer:
+            raise ValueError("customer not found")
+
+        # Fetch every referenced product in one IN query
+        ids = {it.product_id for it in items}
+        prods: Dict[int, Product] = {
+            p.id: p for p in session.exec(select(Product).where(Product.id.in_(ids))).all()
+        }
+
+        # Validate items and compute totals
+        total = 0
+        prepared: List[Dict[str, int]] = []
+        qty_by_product: Dict[int, int] = {}
+        for it in items:
+            if it.quantity <= 0:
+                raise ValueError("quantity must be positive")
+            prod = prods.get(it.product_id)
+            if not prod:
+                raise ValueError(f"product {it.product_id} not found")
+            qty_by_product[prod.id] = qty_by_product.get(prod.id, 0) + it.quantity
+            if prod.stock < qty_by_product[prod.id]:
+                raise ValueError(f"insufficient stock for product {prod.id}")
+            subtotal = prod.price_cents * it.quantity
+            total += subtotal
+            prepared.append({
+                "product_id": prod.id,
+                "quantity": it.quantity,
+                "unit_price_cents": prod.price_cents,
+                "subtotal_cents": subtotal
+            })
+
+        # Create order + items and decrement stock in one transaction;
+        # the flush assigns order.id without committing
+        order = Order(customer_id=customer_id, status="pending", total_cents=total,
+                      created_at=now, updated_at=now)
+        session.add(order); session.flush()
+        session.add_all([OrderItem(order_id=order.id, **pr) for pr in prepared])
+        # a single UPDATE ... CASE for every product's stock; the stock guard
+        # re-checks inside the write, since a concurrent order may have taken
+        # stock after the read above
+        qty = case(qty_by_product, value=Product.id)
+        decremented = session.exec(
+            update(Product)
+            .where(Product.id.in_(qty_by_product), Product.stock >= qty)
+            .values(stock=Product.stock - qty, updated_at=now)
+            .execution_options(synchronize_session="fetch")
+        )
+        if decremented.rowcount != len(qty_by_product):
+            raise ValueError("insufficient stock")  # request_session rolls back
+        result = to_order_type(order)
+        session.commit()
+        return result
+
+@in_threadpool
+def write_order_status(ctx: Dict[str, Any], order_id: int, status: str, now: datetime) -> OrderType:
+    with request_session(ctx) as session:
+        order = session.get(Order, order_id)
+        if not order:
+            raise ValueError("order not found")
+        order.status = status
+        order.updated_at = now
+        session.add(order); session.commit()
+        return to_order_type(order)
 
 @strawberry.type
 class Mutation:
     @strawberry.mutation
-    def create_product(self, input: ProductCreateInput) -> ProductType:
+    @in_threadpool
+    def create_product(self, info, input: ProductCreateInput) -> ProductType:
         if input.price_cents < 0 or input.stock < 0:
             raise ValueError("price_cents and stock must be non-negative")
-        with Session(engine) as session:
+        with request_session(info.context) as session:
             p = Product(
                 title=input.title, description=input.description,
                 price_cents=input.price_cents, stock=input.stock
             )
             session.add(p)
-            session.commit(); session.refresh(p)
+            session.commit()
             return to_product_type(p)
 
     @strawberry.mutation
-    def update_product(self, id: int, input: ProductUpdateInput) -> ProductType:
-        with Session(engine) as session:
+    @in_threadpool
+    def update_product(self, info, id: int, input: ProductUpdateInput) -> ProductType:
+        with request_session(info.context) as session:
+            # validate everything before touching p
+            if input.price_cents is not None and input.price_cents < 0:
+                raise ValueError("price_cents must be >= 0")
+            if input.stock is not None and input.stock < 0:
+                raise ValueError("stock must be >= 0")
             p = session.get(Product, id)
             if not p:
                 raise ValueError("product not found")
             if input.title is not None: p.title = input.title
             if input.description is not None: p.description = input.description
-            if input.price_cents is not None:
-                if input.price_cents < 0:
-                    raise ValueError("price_cents must be >= 0")
-                p.price_cents = input.price_cents
-            if input.stock is not None:
-                if input.stock < 0:
-                    raise ValueError("stock must be >= 0")
-                p.stock = input.stock
+            if input.price_cents is not None: p.price_cents = input.price_cents
+            if input.stock is not None: p.stock = input.stock
             p.updated_at = datetime.utcnow()
-            session.add(p); session.commit(); session.refresh(p)
+            session.add(p); session.commit()
             return to_product_type(p)
 
     @strawberry.mutation
-    def create_customer(self, input: CustomerCreateInput) -> CustomerType:
-        with Session(engine) as session:
+    @in_threadpool
+    def create_customer(self, info, input: CustomerCreateInput) -> CustomerType:
+        with request_session(info.context) as session:
             c = Customer(name=input.name, email=input.email)
-            session.add(c); session.commit(); session.refresh(c)
+            session.add(c); session.commit()
             return to_customer_type(c)
 
     @strawberry.mutation
-    async def place_order(self, customer_id: int, items: List[OrderItemInput]) -> OrderType:
+    async def place_order(self, info, customer_id: int, items: List[OrderItemInput]) -> OrderType:
         if not items:
             raise ValueError("items cannot be empty")
-        with Session(engine) as session:
-            customer = session.get(Customer, customer_id)
-            if not customer:
-                raise ValueError("customer not found")
-
-            # Validate items and compute totals
-            total = 0
-            prepared: List[Dict[str, int]] = []
-            for it in items:
-                if it.quantity <= 0:
-                    raise ValueError("quantity must be positive")
-                prod = session.get(Product, it.product_id)
-                if not prod:
-                    raise ValueError(f"product {it.product_id} not found")
-                if prod.stock < it.quantity:
-                    raise ValueError(f"insufficient stock for product {prod.id}")
-                subtotal = prod.price_cents * it.quantity
-                total += subtotal
-                prepared.append({
-                    "product_id": prod.id,
-                    "quantity": it.quantity,
-                    "unit_price_cents": prod.price_cents,
-                    "subtotal_cents": subtotal
-                })
-
-            # Create order + items, decrement stock
-            order = Order(customer_id=customer_id, status="pending", total_cents=total)
-            session.add(order); session.commit(); session.refresh(order)
-
-            for pr in prepared:
-                oi = OrderItem(order_id=order.id, **pr)
-                session.add(oi)
-                # decrement stock
-                prod = session.get(Product, pr["product_id"])
-                prod.stock -= pr["quantity"]
-                prod.updated_at = datetime.utcnow()
-                session.add(prod)
-
-            order.updated_at = datetime.utcnow()
-            session.add(order); session.commit()
-
-            # Publish real-time event
-            await bus.publish(topic_order_created(), OrderEventType(
-                order_id=order.id, status=order.status, total_cents=order.total_cents,
-                emitted_at=iso(datetime.utcnow())
-            ))
-            await bus.publish(topic_order_updated(order.id), OrderEventType(
-                order_id=order.id, status=order.status, total_cents=order.total_cents,
-                emitted_at=iso(datetime.utcnow())
-            ))
-
-            return to_order_type(session, order)
+        # one clock read per mutation, shared by every timestamp it writes
+        now = datetime.utcnow()
+        result = await write_order(info.context, customer_id, items, now)
+        # Publish real-time event
+        await bus.publish_many((topic_order_created(), topic_order_updated(result.id)), OrderEventType(
+            order_id=result.id, status=result.status, total_cents=result.total_cents,
+            emitted_at=iso(now)
+        ))
+        return result
 
     @strawberry.mutation
-    async def update_order_status(self, order_id: int, status: str) -> OrderType:
+    async def update_order_status(self, info, order_id: int, status: str) -> OrderType:
         status = status.lower()
         if status not in VALID_STATUSES:
-            raise ValueError(f"invalid status. valid: {sorted(VALID_STATUSES)}")
-        with Session(engine) as session:
-            order = session.get(Order, order_id)
-            if not order:
-                raise ValueError("order not found")
-            order.status = status
-            order.updated_at = datetime.utcnow()
-            session.add(order); session.commit()
-            # Publish real-time update
-            await bus.publish(topic_order_updated(order.id), OrderEventType(
-                order_id=order.id, status=order.status, total_cents=order.total_cents,
-                emitted_at=iso(datetime.utcnow())
-            ))
-            return to_order_type(session, order)
+            raise ValueError(INVALID_STATUS_MSG)
+        now = datetime.utcnow()
+        result = await write_order_status(info.context, order_id, status, now)
+        # Publish real-time update
+        await bus.publish(topic_order_updated(result.id), OrderEventType(
+            order_id=result.id, status=result.status, total_cents=result.total_cents,
+            emitted_at=iso(now)
+        ))
+        return result
 
 # ---------------------------
 # GraphQL Root: Subscription
@@ -401,9 +596,58 @@ class Subscription:
 # App wiring
 # ---------------------------
 
+class ORJSONGraphQLRouter(GraphQLRouter):
+    """GraphQLRouter that parses requests and encodes results with orjson instead of stdlib json."""
+
+    def parse_json(self, data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            raise HTTPException(400, "Unable to parse request body as JSON") from e
+
+    def encode_json(self, response_data) -> bytes:
+        return orjson.dumps(response_data)
+
 schema = strawberry.Schema(query=Query, mutation=Mutation, subscription=Subscription)
-app = FastAPI(title="E-commerce GraphQL API")
-app.include_router(GraphQLRouter(schema), prefix="/graphql")
+app = FastAPI(title="E-commerce GraphQL API", default_response_class=ORJSONResponse)
+app.include_router(ORJSONGraphQLRouter(schema, context_getter=get_context), prefix="/graphql")
+
+# Query batching: clients such as Apollo's BatchHttpLink (pointed at /graphql/batch)
+# send a JSON array of {query, variables, operationName}. All operations share one
+# context (session, loaders), so that setup is paid once per batch; they run
+# in order, so a mutation is visible to later operations in the same batch.
+MAX_BATCH_OPERATIONS = 10
+
+def batch_operation_error(op: Dict[str, Any]) -> Optional[str]:
+    """Why a batch entry can't be executed, or None when it is well formed."""
+    if not isinstance(op.get("query"), str):
+        return "operation must have a string 'query'"
+    if not isinstance(op.get("variables"), (dict, type(None))):
+        return "'variables' must be an object or null"
+    if not isinstance(op.get("operationName"), (str, type(None))):
+        return "'operationName' must be a string or null"
+    return None
+
+@app.post("/graphql/batch")
+async def graphql_batch(operations: List[Dict[str, Any]] = Body(...),
+                        context: Dict[str, Any] = Depends(get_context)):
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"at most {MAX_BATCH_OPERATIONS} operations per batch")
+    results = []
+    for op in operations:
+        # a malformed entry gets its own error result; the rest of the batch still runs
+        error = batch_operation_error(op)
+        if error:
+            results.append({"errors": [{"message": error}]})
+            continue
+        result = await schema.execute(
+            op["query"],
+            variable_values=op.get("variables"),
+            operation_name=op.get("operationName"),
+            context_value=context,
+        )
+        results.append(process_result(result))
+    return results
 
 @app.on_event("startup")
 def _startup() -> None:
@@ -412,4 +656,4 @@ def _startup() -> None:
 # Optional health check (handy for Docker/k8s)
 @app.get("/health")
 def health():
-    return {"status": "ok", "time": iso(datetime.utcnow())}
+    return {"status": "ok", "time": iso_now(), "dropped_events": bus.dropped}
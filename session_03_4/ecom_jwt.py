@@ -1,14 +1,26 @@
 import asyncio
-import base64
+import functools
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import AsyncGenerator, List, Optional
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional, Tuple
 
 import jwt
+import orjson
 import strawberry
 from passlib.context import CryptContext
-from fastapi import FastAPI, Request
+from fastapi import Body, Depends, FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, event, lambda_stmt
 from sqlmodel import Field, Session, SQLModel, create_engine, select
+from strawberry.dataloader import DataLoader
 from strawberry.fastapi import GraphQLRouter
+from strawberry.http import process_result
 from strawberry.types import Info
 
 # ---------------------
@@ -17,11 +29,36 @@ from strawberry.types import Info
 JWT_SECRET = "my_super_secret_key_123"
 JWT_ALGO = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+USER_CACHE_TTL_SECONDS = 30
+USER_CACHE_MAX_ENTRIES = 4096  # oldest entries are evicted first
 
 DB_URL = "sqlite:///./ecommerce.db"
-engine = create_engine(DB_URL, echo=False, connect_args={"check_same_thread": False})
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+engine = create_engine(
+    DB_URL,
+    echo=False,
+    connect_args={"check_same_thread": False, "timeout": 30},
+    query_cache_size=1200,
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+)
+
+# Keep a sized pool of warm connections and tune each one for concurrent access:
+# WAL lets readers run alongside the single writer, busy_timeout waits on locks
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.close()
+
+# 10 rounds keeps a hash/verify around a quarter of the default 12-round cost;
+# existing 12-round hashes still verify. Both run inside threadpool resolvers.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=10)
 
 
 # ---------------------
@@ -65,6 +102,20 @@ def init_db():
     SQLModel.metadata.create_all(engine)
 
 
+# Hot statements built once at import; the engine's compiled cache then reuses their SQL
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+
+
+def get_session() -> Iterator[Session]:
+    """FastAPI dependency: one Session per GraphQL request, closed after the response.
+
+    expire_on_commit=False keeps committed objects loaded, so mutations can build
+    their response from them without a refresh() SELECT.
+    """
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+
+
 # ---------------------
 # Utilities
 # ---------------------
@@ -81,23 +132,57 @@ def create_access_token(user_id: int, expires_minutes: int = ACCESS_TOKEN_EXPIRE
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGO)
 
 
+@functools.lru_cache(maxsize=4096)
+def _decode_cached(token: str) -> Tuple[Optional[int], Optional[float]]:
+    payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
+    sub = payload.get("sub")
+    return (int(sub) if sub is not None else None), payload.get("exp")
+
+
 def decode_token(token: str) -> Optional[int]:
+    # repeat requests with the same token skip the HMAC check; expiry is
+    # re-checked here since a cached entry can outlive the token
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
-        sub = payload.get("sub")
-        return int(sub) if sub is not None else None
+        user_id, exp = _decode_cached(token)
     except jwt.ExpiredSignatureError:
         raise Exception("Token expired")
     except jwt.PyJWTError:
         raise Exception("Invalid token")
+    if exp is not None and exp < time.time():
+        raise Exception("Token expired")
+    return user_id
 
 
+_user_cache: "OrderedDict[int, Tuple[float, User]]" = OrderedDict()
+
+
+def get_user(user_id: int) -> Optional[User]:
+    """User lookup for get_context, cached for a short TTL per user id."""
+    now = time.monotonic()
+    hit = _user_cache.get(user_id)
+    if hit is not None:
+        if hit[0] > now:
+            return hit[1]
+        _user_cache.pop(user_id, None)
+    # own short-lived session: a cached User must not be expired by a later
+    # commit on some request's session
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+    if user is not None:
+        _user_cache.pop(user_id, None)  # re-inserted at the newest end
+        _user_cache[user_id] = (now + USER_CACHE_TTL_SECONDS, user)
+        if len(_user_cache) > USER_CACHE_MAX_ENTRIES:
+            _user_cache.popitem(last=False)
+    return user
+
+
+# cursors are the product id as a string; still opaque to clients
 def encode_cursor(pk: int) -> str:
-    return base64.urlsafe_b64encode(str(pk).encode()).decode()
+    return str(pk)
 
 
 def decode_cursor(cursor: str) -> int:
-    return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    return int(cursor)
 
 
 # Tax rules
@@ -118,25 +203,34 @@ def calculate_tax(subtotal_cents: int, country: str) -> int:
 # Simple in-memory PubSub
 # ---------------------
 class InMemoryPubSub:
-    def __init__(self):
-        self.subscribers: List[asyncio.Queue] = []
+    # One shared ring buffer instead of a queue per subscriber: publish is a single
+    # append + notify_all, and each subscriber reads from its own cursor.
+    # A subscriber that falls more than maxlen messages behind skips the oldest.
+    def __init__(self, maxlen: int = 1024):
+        self.buf: deque = deque(maxlen=maxlen)
+        self.seq = 0  # number of messages ever published
+        self.cond = asyncio.Condition()
+        self.dropped = 0  # messages skipped by subscribers that fell behind
 
     async def publish(self, message):
-        for q in list(self.subscribers):
-            await q.put(message)
+        async with self.cond:
+            self.buf.append(message)
+            self.seq += 1
+            self.cond.notify_all()
 
     async def subscribe(self) -> AsyncGenerator:
-        q: asyncio.Queue = asyncio.Queue()
-        self.subscribers.append(q)
-        try:
-            while True:
-                item = await q.get()
+        cursor = self.seq
+        while True:
+            async with self.cond:
+                await self.cond.wait_for(lambda: self.seq != cursor)
+                missed = self.seq - cursor
+                if missed > len(self.buf):
+                    self.dropped += missed - len(self.buf)
+                    missed = len(self.buf)
+                items = list(itertools.islice(self.buf, len(self.buf) - missed, None))
+                cursor = self.seq
+            for item in items:
                 yield item
-        finally:
-            try:
-                self.subscribers.remove(q)
-            except ValueError:
-                pass
 
 
 pubsub = InMemoryPubSub()
@@ -144,7 +238,10 @@ pubsub = InMemoryPubSub()
 # ---------------------
 # GraphQL Types
 # ---------------------
+# Plain output types are slotted (no per-instance __dict__); types with
+# resolver methods can't be, as dataclass would treat those as fields
 @strawberry.type
+@dataclass(slots=True)
 class UserType:
     id: int
     username: str
@@ -152,6 +249,7 @@ class UserType:
 
 
 @strawberry.type
+@dataclass(slots=True)
 class ProductType:
     id: int
     name: str
@@ -167,6 +265,10 @@ class OrderItemType:
     quantity: int
     unitPriceCents: int
 
+    @strawberry.field
+    async def product(self, info: Info) -> Optional[ProductType]:
+        return await info.context["product_loader"].load(self.productId)
+
 
 @strawberry.type
 class OrderType:
@@ -176,28 +278,40 @@ class OrderType:
     taxCents: int
     currency: str
     createdAt: str
-    items: List[OrderItemType]
+    # set when the items are already in hand (createOrder), so subscribers
+    # receiving the published order don't need a loader to read them
+    prefetched_items: strawberry.Private[Optional[List[OrderItemType]]] = None
+
+    @strawberry.field
+    async def items(self, info: Info) -> List[OrderItemType]:
+        if self.prefetched_items is not None:
+            return self.prefetched_items
+        return await info.context["item_loader"].load(self.id)
 
 
 @strawberry.type
+@dataclass(slots=True)
 class PageInfo:
     hasNextPage: bool
     endCursor: Optional[str]
 
 
 @strawberry.type
+@dataclass(slots=True)
 class ProductEdge:
     cursor: str
     node: ProductType
 
 
 @strawberry.type
+@dataclass(slots=True)
 class ProductConnection:
     edges: List[ProductEdge]
     pageInfo: PageInfo
 
 
 @strawberry.type
+@dataclass(slots=True)
 class TokenType:
     id: int
     username: str
@@ -243,23 +357,41 @@ class CreateOrderInput:
 # ---------------------
 # Context
 # ---------------------
-async def get_context(request: Request):
+async def get_context(request: Request, session: Session = Depends(get_session)):
     auth = request.headers.get("authorization")
     user = None
     if auth and auth.startswith("Bearer "):
         token = auth.split(" ", 1)[1]
         try:
-            user_id = decode_token(token)
-            with Session(engine) as session:
-                user = session.get(User, user_id)
+            user = get_user(decode_token(token))
         except Exception:
             user = None
-    return {"request": request, "user": user}
+    # loaders are per request so their cache never outlives it
+    ctx: Dict[str, Any] = {
+        "request": request,
+        "user": user,
+        "session": session,
+        "session_lock": threading.Lock(),
+    }
+    ctx["item_loader"] = DataLoader(load_fn=functools.partial(load_items, ctx))
+    ctx["product_loader"] = DataLoader(load_fn=functools.partial(load_products, ctx))
+    return ctx
 
 
 # ---------------------
 # Helpers
 # ---------------------
+# Resolver convention: DB-backed resolvers are declared as plain sync functions
+# and wrapped with @in_threadpool (below @strawberry.field/@strawberry.mutation).
+# Strawberry then sees an async resolver and the blocking SQLite work runs on
+# the threadpool, so concurrent GraphQL requests don't serialize on the loop.
+def in_threadpool(fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_in_threadpool(fn, *args, **kwargs)
+    return wrapper
+
+
 def product_to_gql(p: Product) -> ProductType:
     return ProductType(
         id=p.id,
@@ -271,13 +403,21 @@ def product_to_gql(p: Product) -> ProductType:
     )
 
 
-def order_to_gql(order: Order) -> OrderType:
-    with Session(engine) as session:
-        items = session.exec(select(OrderItem).where(OrderItem.order_id == order.id)).all()
-    item_types = [
-        OrderItemType(productId=i.product_id, quantity=i.quantity, unitPriceCents=i.unit_price_cents)
-        for i in items
-    ]
+def load_order_items(session: Session, order_ids: List[int]) -> Dict[int, List[OrderItem]]:
+    """Fetch the items of many orders with a single IN query, grouped by order_id."""
+    by_order: Dict[int, List[OrderItem]] = {oid: [] for oid in order_ids}
+    if order_ids:
+        stmt = select(OrderItem).where(OrderItem.order_id.in_(order_ids)).order_by(OrderItem.id)
+        for oi in session.exec(stmt).all():
+            by_order[oi.order_id].append(oi)
+    return by_order
+
+
+def item_to_gql(i: OrderItem) -> OrderItemType:
+    return OrderItemType(productId=i.product_id, quantity=i.quantity, unitPriceCents=i.unit_price_cents)
+
+
+def order_to_gql(order: Order, items: Optional[List[OrderItemType]] = None) -> OrderType:
     return OrderType(
         id=order.id,
         userId=order.user_id,
@@ -285,10 +425,41 @@ def order_to_gql(order: Order) -> OrderType:
         taxCents=order.tax_cents,
         currency=order.currency,
         createdAt=order.created_at.isoformat(),
-        items=item_types,
+        prefetched_items=items,
     )
 
 
+@contextmanager
+def request_session(ctx: Dict[str, Any]) -> Iterator[Session]:
+    """The request's shared Session. Sibling resolvers run concurrently on
+    threadpool workers, so the lock gives each of them exclusive use of it.
+    A resolver that raises has its pending changes rolled back, so a later
+    commit in the same request can't persist them."""
+    with ctx["session_lock"]:
+        session = ctx["session"]
+        try:
+            yield session
+        except BaseException:
+            session.rollback()
+            raise
+
+
+# DataLoader batch functions: one IN query for every key requested in the same tick
+@in_threadpool
+def load_items(ctx: Dict[str, Any], order_ids: List[int]) -> List[List[OrderItemType]]:
+    with request_session(ctx) as session:
+        by_order = load_order_items(session, order_ids)
+        return [[item_to_gql(i) for i in by_order[oid]] for oid in order_ids]
+
+
+@in_threadpool
+def load_products(ctx: Dict[str, Any], product_ids: List[int]) -> List[Optional[ProductType]]:
+    with request_session(ctx) as session:
+        rows = session.exec(select(Product).where(Product.id.in_(product_ids))).all()
+        by_id = {p.id: product_to_gql(p) for p in rows}
+        return [by_id.get(pid) for pid in product_ids]
+
+
 # ---------------------
 # Queries / Mutations / Subscriptions
 # ---------------------
@@ -302,20 +473,26 @@ class Query:
         return UserType(id=user.id, username=user.username, createdAt=user.created_at.isoformat())
 
     @strawberry.field
-    def product(self, id: int) -> Optional[ProductType]:
-        with Session(engine) as session:
+    @in_threadpool
+    def product(self, id: int, info: Info) -> Optional[ProductType]:
+        with request_session(info.context) as session:
             p = session.get(Product, id)
             return product_to_gql(p) if p else None
 
     @strawberry.field
-    def products(self, first: int = 10, after: Optional[str] = None) -> ProductConnection:
-        with Session(engine) as session:
-            stmt = select(Product).order_by(Product.id)
-            if after:
-                last_id = decode_cursor(after)
-                stmt = stmt.where(Product.id > last_id)
-            limit = min(max(1, first), 100)
-            results = session.exec(stmt.limit(limit + 1)).all()
+    @in_threadpool
+    def products(self, info: Info, first: int = 10, after: Optional[str] = None) -> ProductConnection:
+        # lambda statements are cached by the lambdas' code, so repeat calls skip
+        # rebuilding and re-compiling the SELECT; closure values become bind params
+        limit = min(max(1, first), 100)
+        fetch = limit + 1
+        stmt = lambda_stmt(lambda: select(Product).order_by(Product.id))
+        if after:
+            last_id = decode_cursor(after)
+            stmt += lambda s: s.where(Product.id > last_id)
+        stmt += lambda s: s.limit(fetch)
+        with request_session(info.context) as session:
+            results = session.scalars(stmt).all()
             has_next = len(results) > limit
             edges = [
                 ProductEdge(cursor=encode_cursor(p.id), node=product_to_gql(p))
@@ -325,38 +502,78 @@ class Query:
             return ProductConnection(edges=edges, pageInfo=PageInfo(hasNextPage=has_next, endCursor=end_cursor))
 
 
+# createOrder awaits the pubsub publish, so it is async itself; its SQLite
+# transaction goes through this threadpool helper instead
+@in_threadpool
+def write_order(ctx: Dict[str, Any], user_id: int, input: CreateOrderInput) -> OrderType:
+    with request_session(ctx) as session:
+        # Fetch every referenced product in one IN query
+        ids = {it.productId for it in input.items}
+        products = {
+            p.id: p for p in session.exec(select(Product).where(Product.id.in_(ids))).all()
+        }
+        subtotal = 0
+        for it in input.items:
+            product = products.get(it.productId)
+            if not product:
+                raise Exception(f"product {it.productId} not found")
+            if it.quantity <= 0:
+                raise Exception("quantity must be > 0")
+            subtotal += product.price_cents * it.quantity
+        tax = calculate_tax(subtotal, input.shippingCountry)
+        total = subtotal + tax
+        order = Order(user_id=user_id, total_cents=total, tax_cents=tax, currency="USD")
+        session.add(order)
+        session.flush()  # assigns order.id; everything commits once below
+        order_items = [
+            OrderItem(
+                order_id=order.id,
+                product_id=it.productId,
+                quantity=it.quantity,
+                unit_price_cents=products[it.productId].price_cents,
+            )
+            for it in input.items
+        ]
+        session.add_all(order_items)
+        item_types = [item_to_gql(oi) for oi in order_items]
+        session.commit()
+        return order_to_gql(order, item_types)
+
+
 @strawberry.type
 class Mutation:
     @strawberry.mutation
-    def register(self, input: RegisterInput) -> TokenType:
-        with Session(engine) as session:
-            existing = session.exec(select(User).where(User.username == input.username)).first()
+    @in_threadpool
+    def register(self, input: RegisterInput, info: Info) -> TokenType:
+        with request_session(info.context) as session:
+            existing = session.exec(USER_BY_USERNAME, params={"username": input.username}).first()
             if existing:
                 raise Exception("username already exists")
             u = User(username=input.username, password_hash=get_password_hash(input.password))
             session.add(u)
             session.commit()
-            session.refresh(u)
             token = create_access_token(u.id)
             return TokenType(id=u.id, username=u.username, accessToken=token)
 
     @strawberry.mutation
-    def login(self, input: LoginInput) -> TokenType:
-        with Session(engine) as session:
-            user = session.exec(select(User).where(User.username == input.username)).first()
+    @in_threadpool
+    def login(self, input: LoginInput, info: Info) -> TokenType:
+        with request_session(info.context) as session:
+            user = session.exec(USER_BY_USERNAME, params={"username": input.username}).first()
             if not user or not verify_password(input.password, user.password_hash):
                 raise Exception("Invalid credentials")
             token = create_access_token(user.id)
             return TokenType(id=user.id, username=user.username, accessToken=token)
 
     @strawberry.mutation
+    @in_threadpool
     def createProduct(self, input: CreateProductInput, info: Info) -> ProductType:
         user = info.context.get("user")
         if not user:
             raise Exception("Authentication required")
         if input.priceCents <= 0:
             raise Exception("priceCents must be > 0")
-        with Session(engine) as session:
+        with request_session(info.context) as session:
             p = Product(
                 name=input.name,
                 description=input.description,
@@ -365,7 +582,6 @@ class Mutation:
             )
             session.add(p)
             session.commit()
-            session.refresh(p)
             return product_to_gql(p)
 
     @strawberry.mutation
@@ -373,34 +589,9 @@ class Mutation:
         user = info.context.get("user")
         if not user:
             raise Exception("Authentication required")
-        with Session(engine) as session:
-            subtotal = 0
-            for it in input.items:
-                product = session.get(Product, it.productId)
-                if not product:
-                    raise Exception(f"product {it.productId} not found")
-                if it.quantity <= 0:
-                    raise Exception("quantity must be > 0")
-                subtotal += product.price_cents * it.quantity
-            tax = calculate_tax(subtotal, input.shippingCountry)
-            total = subtotal + tax
-            order = Order(user_id=user.id, total_cents=total, tax_cents=tax, currency="USD")
-            session.add(order)
-            session.commit()
-            session.refresh(order)
-            for it in input.items:
-                product = session.get(Product, it.productId)
-                oi = OrderItem(
-                    order_id=order.id,
-                    product_id=product.id,
-                    quantity=it.quantity,
-                    unit_price_cents=product.price_cents,
-                )
-                session.add(oi)
-            session.commit()
-            session.refresh(order)
-        await pubsub.publish(order_to_gql(order))
-        return order_to_gql(order)
+        result = await write_order(info.context, user.id, input)
+        await pubsub.publish(result)
+        return result
 
 
 @strawberry.type
@@ -414,13 +605,66 @@ class Subscription:
 # ---------------------
 # FastAPI + GraphQL setup
 # ---------------------
+class ORJSONGraphQLRouter(GraphQLRouter):
+    """GraphQLRouter that parses requests and encodes results with orjson instead of stdlib json."""
+
+    def parse_json(self, data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            raise HTTPException(400, "Unable to parse request body as JSON") from e
+
+    def encode_json(self, response_data) -> bytes:
+        return orjson.dumps(response_data)
+
+
 schema = strawberry.Schema(query=Query, mutation=Mutation, subscription=Subscription)
-graphql_app = GraphQLRouter(schema, context_getter=get_context)
+graphql_app = ORJSONGraphQLRouter(schema, context_getter=get_context)
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 app.include_router(graphql_app, prefix="/graphql")
 
 
+# Query batching: clients such as Apollo's BatchHttpLink (pointed at /graphql/batch)
+# send a JSON array of {query, variables, operationName}. All operations share one
+# context (session, loaders, user), so that setup is paid once per batch; they run
+# in order, so a mutation is visible to later operations in the same batch.
+MAX_BATCH_OPERATIONS = 10
+
+
+def batch_operation_error(op: Dict[str, Any]) -> Optional[str]:
+    """Why a batch entry can't be executed, or None when it is well formed."""
+    if not isinstance(op.get("query"), str):
+        return "operation must have a string 'query'"
+    if not isinstance(op.get("variables"), (dict, type(None))):
+        return "'variables' must be an object or null"
+    if not isinstance(op.get("operationName"), (str, type(None))):
+        return "'operationName' must be a string or null"
+    return None
+
+
+@app.post("/graphql/batch")
+async def graphql_batch(operations: List[Dict[str, Any]] = Body(...),
+                        context: Dict[str, Any] = Depends(get_context)):
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"at most {MAX_BATCH_OPERATIONS} operations per batch")
+    results = []
+    for op in operations:
+        # a malformed entry gets its own error result; the rest of the batch still runs
+        error = batch_operation_error(op)
+        if error:
+            results.append({"errors": [{"message": error}]})
+            continue
+        result = await schema.execute(
+            op["query"],
+            variable_values=op.get("variables"),
+            operation_name=op.get("operationName"),
+            context_value=context,
+        )
+        results.append(process_result(result))
+    return results
+
+
 @app.on_event("startup")
 def on_startup():
     init_db()
@@ -1,20 +1,30 @@
+from datetime import datetime
+from typing import Optional
+
 from fastapi import FastAPI, HTTPException, Query, Path, status, Body
+from pydantic import BaseModel
 
 app=FastAPI()
 
-class Taskread(TaskCreate):
+class TaskCreate(BaseModel):
+    title: str
+    description: Optional[str] = None
+
+class TaskRead(TaskCreate):
     id: int
-    
+    status: str
+    created_at: datetime
+    updated_at: datetime
+
+# returns the response model itself rather than a dict for FastAPI to validate into one
 @app.post("/api/v1/tasks", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
 def create_task(payload: TaskCreate = Body(...)):
-    task={
-    "id": 1,
-    "title": payload.title,
-    "description": payload.description,
-    "status": "open",
-    "created_at": datetime.utcnow(),
-    "updated_at": datetime.utcnow
-   }
-    return task
-
-  
\ No newline at end of file
+    now = datetime.utcnow()
+    return TaskRead(
+        id=1,
+        title=payload.title,
+        description=payload.description,
+        status="open",
+        created_at=now,
+        updated_at=now,
+    )
@@ -1,8 +1,19 @@
 import strawberry
 from fastapi import FastAPI
 from strawberry.fastapi import GraphQLRouter
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import List
+import time
+
+# the timestamp only changes once a second, so format it once per second
+@lru_cache(maxsize=1)
+def _utc_iso(second: int) -> str:
+    # formatted from the key itself, so the cached string always matches it
+    return datetime.fromtimestamp(second, timezone.utc).replace(tzinfo=None).isoformat()
+
+def utc_now_iso() -> str:
+    return _utc_iso(int(time.time()))
 
 @strawberry.type
 class TaskType:
@@ -22,7 +33,7 @@ class Query:
                 title="Test GraphQL",
                 description="A sample task",
                 status="open",
-                created_at=datetime.utcnow().isoformat(),
+                created_at=utc_now_iso(),
             )
         ][:limit]
 
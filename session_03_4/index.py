@@ -13,14 +13,33 @@
 # Generate all files: main.py, test_api.py, requirements.txt, README.md.
 
 # main.py
-from typing import Optional, List
-from fastapi import FastAPI, HTTPException, Query, Path, status, Body
+from typing import Optional, List, Annotated
+from fastapi import FastAPI, HTTPException, Query, Path, status, Depends, Request
+from fastapi.responses import ORJSONResponse
 from sqlmodel import SQLModel, Field, create_engine, Session, select
+from sqlalchemy import bindparam, event
+from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 from pydantic import BaseModel, constr
+import msgspec
 
 DB_URL = "sqlite:///./app.db"
 engine = create_engine(DB_URL, echo=False, connect_args={"check_same_thread": False})
+# expire_on_commit=False keeps attributes loaded after commit, so handlers
+# don't need an extra refresh() round trip before returning the object
+SessionLocal = sessionmaker(bind=engine, class_=Session, expire_on_commit=False)
+
+# SQLite tuning applied to every new connection: WAL lets readers run
+# alongside a writer and synchronous=NORMAL drops the per-commit double fsync
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
 
 class Task(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -31,8 +50,11 @@ class Task(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-class TaskCreate(BaseModel):
-    title: constr(min_length=1, max_length=200)
+# Request bodies are validated with msgspec (see msgspec_body); responses stay Pydantic
+Title = Annotated[str, msgspec.Meta(min_length=1, max_length=200)]
+
+class TaskCreate(msgspec.Struct):
+    title: Title
     description: Optional[str] = None
     due_date: Optional[datetime] = None
 
@@ -44,83 +66,108 @@ class TaskRead(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-class TaskUpdate(BaseModel):
-    title: Optional[constr(min_length=1, max_length=200)]
-    description: Optional[str]
-    status: Optional[str]
+# The columns TaskRead exposes; read endpoints select exactly these
+TASK_READ_COLUMNS = (Task.id, Task.title, Task.description, Task.status, Task.created_at, Task.updated_at)
+
+class TaskUpdate(msgspec.Struct):
+    title: Optional[Title] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+
+def msgspec_body(model):
+    """Dependency that decodes and validates the raw JSON body straight into `model`."""
+    async def decode(request: Request):
+        try:
+            return msgspec.json.decode(await request.body(), type=model)
+        except msgspec.DecodeError as exc:  # also covers msgspec.ValidationError
+            raise HTTPException(status_code=422, detail=str(exc))
+    return decode
+
+def msgspec_openapi(model) -> dict:
+    """Request-body docs for a msgspec-validated endpoint (FastAPI can't see them)."""
+    schema = msgspec.json.schema(model)["$defs"][model.__name__]
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+def get_session():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
 
 def init_db():
     SQLModel.metadata.create_all(engine)
 
-app = FastAPI(title="Tasks API", version="1.0.0")
+app = FastAPI(title="Tasks API", version="1.0.0", default_response_class=ORJSONResponse)
 
 @app.on_event("startup")
 def on_startup():
     init_db()
 
-@app.post("/api/v1/tasks", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
-def create_task(payload: TaskCreate = Body(...)):
-    with Session(engine) as session:
-        task = Task(title=payload.title, description=payload.description)
-        session.add(task)
-        session.commit()
-        session.refresh(task)
-        return task
+@app.post("/api/v1/tasks", response_model=TaskRead, status_code=status.HTTP_201_CREATED, openapi_extra=msgspec_openapi(TaskCreate))
+def create_task(payload: TaskCreate = Depends(msgspec_body(TaskCreate)), session: Session = Depends(get_session)):
+    task = Task(title=payload.title, description=payload.description)
+    session.add(task)
+    session.commit()
+    return task
 
 @app.get("/api/v1/tasks", response_model=List[TaskRead])
-def list_tasks(limit: int = Query(20, ge=1, le=100), before_id: Optional[int] = Query(None)):
+def list_tasks(limit: int = Query(20, ge=1, le=100), before_id: Optional[int] = Query(None), session: Session = Depends(get_session)):
     """
     Simple cursor-style pagination using `before_id` to get tasks with id < before_id
+
+    Rows come from our own table, so they are not re-validated against TaskRead
+    on the way out (validation only happens on create/patch).
     """
-    with Session(engine) as session:
-        stmt = select(Task).order_by(Task.id.desc()).limit(limit)
-        if before_id:
-            stmt = stmt.where(Task.id < before_id)
-        results = session.exec(stmt).all()
-        return results
+    stmt = select(*TASK_READ_COLUMNS).order_by(Task.id.desc()).limit(limit)
+    if before_id:
+        stmt = stmt.where(Task.id < before_id)
+    results = session.exec(stmt).all()
+    return ORJSONResponse([r._asdict() for r in results])
+
+# Hot read path: a Core select on a pooled connection returns a plain mapping,
+# skipping ORM hydration, the Session and TaskRead re-validation
+TASK_BY_ID = select(*TASK_READ_COLUMNS).where(Task.id == bindparam("task_id"))
 
 @app.get("/api/v1/tasks/{task_id}", response_model=TaskRead)
 def get_task(task_id: int = Path(..., gt=0)):
-    with Session(engine) as session:
-        task = session.get(Task, task_id)
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
-        return task
-
-@app.patch("/api/v1/tasks/{task_id}", response_model=TaskRead)
-def update_task(task_id: int, payload: TaskUpdate):
-    with Session(engine) as session:
-        task = session.get(Task, task_id)
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
-        updated = False
-        if payload.title is not None:
-            task.title = payload.title
-            updated = True
-        if payload.description is not None:
-            task.description = payload.description
-            updated = True
-        if payload.status is not None:
-            if payload.status not in ("open", "in_progress", "done"):
-                raise HTTPException(status_code=400, detail="Invalid status")
-            task.status = payload.status
-            updated = True
-        if updated:
-            task.updated_at = datetime.utcnow()
-            session.add(task)
-            session.commit()
-            session.refresh(task)
-        return task
+    with engine.connect() as conn:
+        row = conn.execute(TASK_BY_ID, {"task_id": task_id}).mappings().first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return ORJSONResponse(dict(row))
+
+@app.patch("/api/v1/tasks/{task_id}", response_model=TaskRead, openapi_extra=msgspec_openapi(TaskUpdate))
+def update_task(task_id: int, payload: TaskUpdate = Depends(msgspec_body(TaskUpdate)), session: Session = Depends(get_session)):
+    task = session.get(Task, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    updated = False
+    if payload.title is not None:
+        task.title = payload.title
+        updated = True
+    if payload.description is not None:
+        task.description = payload.description
+        updated = True
+    if payload.status is not None:
+        if payload.status not in ("open", "in_progress", "done"):
+            raise HTTPException(status_code=400, detail="Invalid status")
+        task.status = payload.status
+        updated = True
+    if updated:
+        task.updated_at = datetime.utcnow()
+        session.add(task)
+        session.commit()
+    return task
 
 @app.delete("/api/v1/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(task_id: int):
-    with Session(engine) as session:
-        task = session.get(Task, task_id)
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
-        session.delete(task)
-        session.commit()
-        return None
+def delete_task(task_id: int, session: Session = Depends(get_session)):
+    task = session.get(Task, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    session.delete(task)
+    session.commit()
+    return None
 
 # Simple health check
 @app.get("/health")
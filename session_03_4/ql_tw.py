@@ -1,3 +1,4 @@
+from functools import lru_cache
 import strawberry
 from fastapi import FastAPI
 from strawberry.fastapi import GraphQLRouter
@@ -13,6 +14,9 @@ class User:
     name: str
     tasks: list[Task]
 
+# pure function of id, so memoize it instead of rebuilding the User per request;
+# swap for a bounded dict cache if User ever becomes mutable
+@lru_cache(maxsize=1024)
 def get_user(id: int) -> User:
     return User(id=id, name="Alice", tasks=[Task(title="Test", status="open")])
 
@@ -1,16 +1,21 @@
 # main.py
 import asyncio
-import base64
-import json
-import sqlite3
+import functools
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Generator, AsyncGenerator
+from typing import List, Optional, Dict, Any, Generator, AsyncGenerator, Tuple
 
 from fastapi import FastAPI, HTTPException, Depends, Request, Header
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, EmailStr, Field
-from jose import jwt, JWTError
-from passlib.context import CryptContext
+import aiosqlite
+import jwt
+import orjson
+import bcrypt
 import redis.asyncio as aioredis
 
 # --------------------------
@@ -22,33 +27,53 @@ JWT_ALGORITHM = "HS256"
 JWT_EXPIRE_MINUTES = 60 * 24  # 1 day
 REDIS_URL = "redis://localhost:6379/0"
 ORDER_CHANNEL = "orders"
+REDIS_MAX_CONNECTIONS = 32
+USER_CACHE_TTL = 30  # seconds a user row is reused by get_current_user
+LOGIN_CACHE_TTL = 300  # seconds a successful login skips bcrypt on repeat
+CACHE_MAX_ENTRIES = 4096  # per TTL cache; oldest entries are evicted first
+SSE_HEARTBEAT = 15  # seconds between keepalive comments on an idle event stream
+SSE_RESUBSCRIBE_MAX_DELAY = 30  # seconds; backoff cap while the fan-out can't reach Redis
+SSE_QUEUE_SIZE = 1024  # undelivered events buffered per SSE client before it starts missing them
+BLOCKING_WORKERS = 8  # threads for CPU-bound work such as bcrypt
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 10 bcrypt rounds instead of the usual 12: about 4x cheaper per hash/verify;
+# hashes made at 12 rounds still verify
+BCRYPT_ROUNDS = 10
 
-app = FastAPI(title="Ecom REST demo")
+app = FastAPI(title="Ecom REST demo", default_response_class=ORJSONResponse)
 
 redis_client: Optional[aioredis.Redis] = None
+# country_code -> percentage; tax_rules is tiny and only written by bootstrap_db
+# at startup, so orders read it from here instead of SQLite
+TAX_RULES: Dict[str, float] = {}
+DEFAULT_TAX_RULES = [("US", 0.07), ("IN", 0.18)]  # (re)written on every startup
 
 # --------------------------
 # DB helpers
 # --------------------------
-def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
+async def open_db() -> aiosqlite.Connection:
+    """Open the process-wide connection once; every helper shares it via get_conn()."""
+    # a larger statement cache keeps every per-length IN query below prepared too
+    conn = await aiosqlite.connect(DB_PATH, isolation_level=None, cached_statements=512)
+    conn.row_factory = aiosqlite.Row
+    # WAL lets readers run alongside the single writer; NORMAL sync is safe under WAL
+    await conn.execute("PRAGMA journal_mode=WAL")
+    await conn.execute("PRAGMA synchronous=NORMAL")
+    await conn.execute("PRAGMA temp_store=MEMORY")
+    await conn.execute("PRAGMA cache_size=-64000")
     return conn
 
-def create_tables():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
+def get_conn() -> aiosqlite.Connection:
+    return app.state.db
+
+DDL = """
     CREATE TABLE IF NOT EXISTS users (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         email TEXT UNIQUE NOT NULL,
         password_hash TEXT NOT NULL,
         full_name TEXT,
         created_at TEXT NOT NULL
-    )""")
-    cur.execute("""
+    );
     CREATE TABLE IF NOT EXISTS products (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT NOT NULL,
@@ -56,14 +81,12 @@ def create_tables():
         price_cents INTEGER NOT NULL,
         currency TEXT NOT NULL,
         created_at TEXT NOT NULL
-    )""")
-    cur.execute("""
+    );
     CREATE TABLE IF NOT EXISTS tax_rules (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         country_code TEXT UNIQUE NOT NULL,
         percentage REAL NOT NULL
-    )""")
-    cur.execute("""
+    );
     CREATE TABLE IF NOT EXISTS orders (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         user_id INTEGER NOT NULL,
@@ -74,8 +97,7 @@ def create_tables():
         country_code TEXT,
         created_at TEXT NOT NULL,
         FOREIGN KEY(user_id) REFERENCES users(id)
-    )""")
-    cur.execute("""
+    );
     CREATE TABLE IF NOT EXISTS order_items (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         order_id INTEGER NOT NULL,
@@ -84,194 +106,242 @@ def create_tables():
         unit_price_cents INTEGER NOT NULL,
         FOREIGN KEY(order_id) REFERENCES orders(id),
         FOREIGN KEY(product_id) REFERENCES products(id)
-    )""")
-    conn.commit()
-    conn.close()
+    );
+    -- per-user order pagination walks this index instead of scanning and sorting
+    CREATE INDEX IF NOT EXISTS idx_orders_user_id_id ON orders(user_id, id DESC);
+"""
+
+async def create_tables():
+    await get_conn().executescript(DDL)
 
 # --------------------------
 # Auth utils
 # --------------------------
+# bcrypt only reads the first 72 bytes; truncating explicitly keeps hashes made
+# by passlib (which did the same) verifiable
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(password.encode()[:72], bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return bcrypt.checkpw(plain.encode()[:72], hashed.encode())
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=JWT_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire.isoformat()})
+    to_encode.update({"exp": expire})  # encoded as an int epoch
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
+@functools.lru_cache(maxsize=4096)
+def _decode_cached(token: str) -> dict:
+    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+
 def decode_token(token: str) -> Optional[dict]:
+    # repeat requests with the same token skip the signature check; expiry is
+    # re-checked because a cached payload can outlive its token
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
-    except JWTError:
+        payload = _decode_cached(token)
+    except jwt.PyJWTError:
         return None
+    if payload.get("exp", 0) < time.time():
+        return None
+    return payload
+
+def ttl_cache_get(cache: OrderedDict, key: Any) -> Any:
+    """The cached value for key, or None when it is absent or expired (expired entries are dropped)."""
+    hit = cache.get(key)
+    if hit is None:
+        return None
+    if hit[0] > time.monotonic():
+        return hit[1]
+    cache.pop(key, None)
+    return None
+
+def ttl_cache_put(cache: OrderedDict, key: Any, value: Any, ttl: float) -> None:
+    """Store value for ttl seconds; past CACHE_MAX_ENTRIES the oldest entries are evicted."""
+    cache.pop(key, None)  # re-inserted at the newest end
+    cache[key] = (time.monotonic() + ttl, value)
+    while len(cache) > CACHE_MAX_ENTRIES:
+        try:
+            cache.popitem(last=False)
+        except KeyError:  # emptied concurrently
+            break
+
+# email -> (expires_at, sha256(password + stored hash)) for recent successful logins.
+# The stored bcrypt hash (which embeds its salt) is part of the digest, so a
+# password change invalidates the entry.
+_login_cache: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+def verify_password_cached(email: str, plain: str, hashed: str) -> bool:
+    digest = hashlib.sha256(plain.encode() + hashed.encode()).digest()
+    cached = ttl_cache_get(_login_cache, email)
+    if cached is not None and hmac.compare_digest(cached, digest):
+        return True
+    if not verify_password(plain, hashed):
+        return False
+    ttl_cache_put(_login_cache, email, digest, LOGIN_CACHE_TTL)
+    return True
 
 # --------------------------
 # Cursor helpers
 # --------------------------
+# Cursors are opaque to clients but never signed, so the id's decimal string is enough
 def encode_cursor(item_id: int) -> str:
-    return base64.urlsafe_b64encode(str(item_id).encode()).decode()
+    return str(item_id)
 
 def decode_cursor(cursor: str) -> Optional[int]:
-    try:
-        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
-    except Exception:
-        return None
+    # isdigit() also accepts characters like "²" that int() rejects
+    return int(cursor) if cursor.isascii() and cursor.isdecimal() else None
+
+async def run_blocking(fn, *args):
+    """Run CPU-bound work (bcrypt) on the bounded executor instead of the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(app.state.blocking_exec, fn, *args)
 
 # --------------------------
-# DB operations (sync, used via asyncio.to_thread)
+# DB operations (async, aiosqlite)
 # --------------------------
-def db_create_user(email: str, password: str, full_name: Optional[str] = None) -> Dict[str, Any]:
-    conn = get_conn()
-    cur = conn.cursor()
+# All helpers share one autocommit aiosqlite connection (app.state.db). SQLite allows
+# a single writer anyway, so writes take app.state.db_write_lock; reads go straight through.
+async def fetch_one(sql: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+    async with get_conn().execute(sql, params) as cur:
+        row = await cur.fetchone()
+    return dict(row) if row else None
+
+async def fetch_all(sql: str, params: tuple = ()) -> List[aiosqlite.Row]:
+    # rows stay sqlite3.Row; RowJSONResponse turns them into objects while encoding
+    return await get_conn().execute_fetchall(sql, params)
+
+async def db_create_user(email: str, password: str, full_name: Optional[str] = None) -> Dict[str, Any]:
     now = datetime.utcnow().isoformat()
-    pw_hash = hash_password(password)
-    try:
-        cur.execute(
+    pw_hash = await run_blocking(hash_password, password)
+    async with app.state.db_write_lock:
+        cur = await get_conn().execute(
             "INSERT INTO users (email, password_hash, full_name, created_at) VALUES (?, ?, ?, ?)",
             (email, pw_hash, full_name, now),
         )
-        conn.commit()
         user_id = cur.lastrowid
-        row = conn.execute("SELECT id, email, full_name, created_at FROM users WHERE id = ?", (user_id,)).fetchone()
-        return dict(row)
-    finally:
-        conn.close()
+    return await fetch_one("SELECT id, email, full_name, created_at FROM users WHERE id = ?", (user_id,))
 
-def db_get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
-    conn = get_conn()
-    try:
-        row = conn.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
-        return dict(row) if row else None
-    finally:
-        conn.close()
+async def db_get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
+    return await fetch_one("SELECT * FROM users WHERE email = ?", (email,))
 
-def db_get_user_by_id(user_id: int) -> Optional[Dict[str, Any]]:
-    conn = get_conn()
-    try:
-        row = conn.execute("SELECT id, email, full_name, created_at FROM users WHERE id = ?", (user_id,)).fetchone()
-        return dict(row) if row else None
-    finally:
-        conn.close()
+async def db_get_user_by_id(user_id: int) -> Optional[Dict[str, Any]]:
+    return await fetch_one("SELECT id, email, full_name, created_at FROM users WHERE id = ?", (user_id,))
 
-def db_create_product(name: str, description: str, price_cents: int, currency: str) -> Dict[str, Any]:
-    conn = get_conn()
-    cur = conn.cursor()
+_user_cache: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+async def get_user_by_id_cached(user_id: int) -> Optional[Dict[str, Any]]:
+    """db_get_user_by_id behind a short per-id TTL cache."""
+    user = ttl_cache_get(_user_cache, user_id)
+    if user is not None:
+        return user
+    user = await db_get_user_by_id(user_id)
+    if user is not None:
+        ttl_cache_put(_user_cache, user_id, user, USER_CACHE_TTL)
+    return user
+
+async def db_create_product(name: str, description: str, price_cents: int, currency: str) -> Dict[str, Any]:
     now = datetime.utcnow().isoformat()
-    cur.execute(
-        "INSERT INTO products (name, description, price_cents, currency, created_at) VALUES (?, ?, ?, ?, ?)",
-        (name, description, price_cents, currency.upper(), now),
-    )
-    conn.commit()
-    pid = cur.lastrowid
-    row = conn.execute("SELECT * FROM products WHERE id = ?", (pid,)).fetchone()
-    conn.close()
-    return dict(row)
+    async with app.state.db_write_lock:
+        cur = await get_conn().execute(
+            "INSERT INTO products (name, description, price_cents, currency, created_at) VALUES (?, ?, ?, ?, ?)",
+            (name, description, price_cents, currency.upper(), now),
+        )
+        pid = cur.lastrowid
+    return await fetch_one("SELECT * FROM products WHERE id = ?", (pid,))
 
-def db_get_product(product_id: int) -> Optional[Dict[str, Any]]:
-    conn = get_conn()
-    try:
-        row = conn.execute("SELECT * FROM products WHERE id = ?", (product_id,)).fetchone()
-        return dict(row) if row else None
-    finally:
-        conn.close()
+async def db_get_product(product_id: int) -> Optional[Dict[str, Any]]:
+    return await fetch_one("SELECT * FROM products WHERE id = ?", (product_id,))
 
-def db_list_products(after_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
-    conn = get_conn()
-    try:
-        if after_id:
-            rows = conn.execute(
-                "SELECT * FROM products WHERE id < ? ORDER BY id DESC LIMIT ?", (after_id, limit)
-            ).fetchall()
-        else:
-            rows = conn.execute("SELECT * FROM products ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
-        return [dict(r) for r in rows]
-    finally:
-        conn.close()
-
-def db_create_tax_rule(country_code: str, percentage: float):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT OR REPLACE INTO tax_rules (country_code, percentage) VALUES (?, ?)",
-        (country_code.upper(), float(percentage)),
-    )
-    conn.commit()
-    conn.close()
+async def db_list_products(after_id: Optional[int], limit: int) -> List[aiosqlite.Row]:
+    if after_id:
+        return await fetch_all("SELECT * FROM products WHERE id < ? ORDER BY id DESC LIMIT ?", (after_id, limit))
+    return await fetch_all("SELECT * FROM products ORDER BY id DESC LIMIT ?", (limit,))
 
-def db_get_tax_for_country(country_code: str) -> Optional[Dict[str, Any]]:
+async def bootstrap_db():
+    """Schema, default tax rules and the TAX_RULES cache; the seed rows go in one transaction."""
     conn = get_conn()
-    try:
-        row = conn.execute("SELECT * FROM tax_rules WHERE country_code = ?", (country_code.upper(),)).fetchone()
-        return dict(row) if row else None
-    finally:
-        conn.close()
-
-def db_create_order(user_id: int, items: List[Dict[str, Any]], currency: str, country_code: Optional[str]) -> Dict[str, Any]:
+    await create_tables()
+    async with app.state.db_write_lock:
+        await conn.execute("BEGIN")
+        try:
+            await conn.executemany(
+                "INSERT OR REPLACE INTO tax_rules (country_code, percentage) VALUES (?, ?)", DEFAULT_TAX_RULES
+            )
+            await conn.commit()
+        except BaseException:
+            await asyncio.shield(conn.rollback())
+            raise
+    await db_load_tax_rules()
+
+async def db_load_tax_rules():
+    for row in await get_conn().execute_fetchall("SELECT country_code, percentage FROM tax_rules"):
+        TAX_RULES[row["country_code"]] = float(row["percentage"])
+
+@functools.lru_cache(maxsize=256)
+def products_in_sql(n: int) -> str:
+    """Pricing query for n ids; built once per n so the text (and statement cache key) is stable."""
+    return "SELECT id, price_cents, currency FROM products WHERE id IN ({})".format(",".join("?" * n))
+
+async def db_create_order(user_id: int, items: List[Dict[str, Any]], currency: str, country_code: Optional[str]) -> Dict[str, Any]:
     """
     items: list of {"product_id": int, "quantity": int}
     """
     conn = get_conn()
-    cur = conn.cursor()
     now = datetime.utcnow().isoformat()
+    # fetch every referenced product in one IN query
+    ids = tuple({it["product_id"] for it in items})
+    rows = await conn.execute_fetchall(products_in_sql(len(ids)), ids)
+    price_map = {r["id"]: r for r in rows}
     # compute subtotal
     subtotal = 0
     for it in items:
-        row = conn.execute("SELECT price_cents, currency FROM products WHERE id = ?", (it["product_id"],)).fetchone()
+        row = price_map.get(it["product_id"])
         if not row:
-            conn.close()
             raise ValueError(f"product {it['product_id']} not found")
-        price_cents = int(row["price_cents"])
-        prod_currency = row["currency"]
-        if prod_currency.upper() != currency.upper():
-            conn.close()
+        if row["currency"].upper() != currency.upper():
             raise ValueError("currency mismatch for product")
-        subtotal += price_cents * int(it["quantity"])
+        subtotal += int(row["price_cents"]) * int(it["quantity"])
     # tax
-    tax_rule = db_get_tax_for_country(country_code) if country_code else None
-    tax_percent = float(tax_rule["percentage"]) if tax_rule else 0.0
+    tax_percent = TAX_RULES.get((country_code or "").upper(), 0.0)
     tax_amount = int(round(subtotal * tax_percent))
     total = subtotal + tax_amount
-    # create order
-    cur.execute(
-        "INSERT INTO orders (user_id, currency, subtotal_cents, tax_cents, total_cents, country_code, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
-        (user_id, currency.upper(), subtotal, tax_amount, total, (country_code or "").upper(), now),
-    )
-    conn.commit()
-    order_id = cur.lastrowid
-    # create items
-    for it in items:
-        row = conn.execute("SELECT price_cents FROM products WHERE id = ?", (it["product_id"],)).fetchone()
-        cur.execute(
-            "INSERT INTO order_items (order_id, product_id, quantity, unit_price_cents) VALUES (?, ?, ?, ?)",
-            (order_id, it["product_id"], it["quantity"], row["price_cents"]),
+    # order + items in one transaction and one commit; IMMEDIATE takes the write
+    # lock up front so the transaction never has to upgrade from a read lock
+    async with app.state.db_write_lock:
+        await conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = await conn.execute(
+                "INSERT INTO orders (user_id, currency, subtotal_cents, tax_cents, total_cents, country_code, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (user_id, currency.upper(), subtotal, tax_amount, total, (country_code or "").upper(), now),
+            )
+            order_id = cur.lastrowid
+            item_rows = [
+                (order_id, it["product_id"], it["quantity"], price_map[it["product_id"]]["price_cents"])
+                for it in items
+            ]
+            await conn.executemany(
+                "INSERT INTO order_items (order_id, product_id, quantity, unit_price_cents) VALUES (?, ?, ?, ?)",
+                item_rows,
+            )
+            await conn.commit()
+        except BaseException:
+            # the connection is shared, so an open transaction must not outlive
+            # this call, even when the request is cancelled mid-write
+            await asyncio.shield(conn.rollback())
+            raise
+    return await fetch_one("SELECT * FROM orders WHERE id = ?", (order_id,))
+
+async def db_list_orders_for_user(user_id: int, after_id: Optional[int], limit: int) -> List[aiosqlite.Row]:
+    if after_id:
+        return await fetch_all(
+            "SELECT * FROM orders WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (user_id, after_id, limit),
         )
-    conn.commit()
-    order_row = conn.execute("SELECT * FROM orders WHERE id = ?", (order_id,)).fetchone()
-    conn.close()
-    return dict(order_row)
-
-def db_list_orders_for_user(user_id: int, after_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
-    conn = get_conn()
-    try:
-        if after_id:
-            rows = conn.execute(
-                "SELECT * FROM orders WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
-                (user_id, after_id, limit),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT * FROM orders WHERE user_id = ? ORDER BY id DESC LIMIT ?",
-                (user_id, limit),
-            ).fetchall()
-        return [dict(r) for r in rows]
-    finally:
-        conn.close()
+    return await fetch_all(
+        "SELECT * FROM orders WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+        (user_id, limit),
+    )
 
 # --------------------------
 # Pydantic schemas
@@ -320,6 +390,15 @@ class OrderRead(BaseModel):
     country_code: Optional[str]
     created_at: str
 
+class RowJSONResponse(ORJSONResponse):
+    """ORJSONResponse that accepts sqlite3.Row values.
+
+    orjson still calls dict() on each row, one at a time while encoding, so
+    rows are never held as a whole list of dict copies.
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=dict)
+
 # --------------------------
 # Dependency: get current user from Authorization header
 # --------------------------
@@ -332,7 +411,7 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
     payload = decode_token(token)
     if not payload or "user_id" not in payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
-    user = await asyncio.to_thread(db_get_user_by_id, int(payload["user_id"]))
+    user = await get_user_by_id_cached(int(payload["user_id"]))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
@@ -343,17 +422,17 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
 
 @app.post("/register", response_model=Dict[str, Any])
 async def register(req: RegisterRequest):
-    existing = await asyncio.to_thread(db_get_user_by_email, req.email)
+    existing = await db_get_user_by_email(req.email)
     if existing:
         raise HTTPException(status_code=400, detail="User exists")
-    user = await asyncio.to_thread(db_create_user, req.email, req.password, req.full_name)
+    user = await db_create_user(req.email, req.password, req.full_name)
     # hide sensitive fields
     return {"id": user["id"], "email": user["email"], "full_name": user.get("full_name"), "created_at": user["created_at"]}
 
 @app.post("/login", response_model=AuthResponse)
 async def login(req: RegisterRequest):
-    user = await asyncio.to_thread(db_get_user_by_email, req.email)
-    if not user or not verify_password(req.password, user["password_hash"]):
+    user = await db_get_user_by_email(req.email)
+    if not user or not await run_blocking(verify_password_cached, user["email"], req.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token = create_access_token({"user_id": user["id"]})
     return AuthResponse(access_token=token)
@@ -361,30 +440,30 @@ async def login(req: RegisterRequest):
 @app.post("/products", response_model=ProductRead)
 async def create_product(req: ProductCreateRequest, current_user: Dict = Depends(get_current_user)):
     # In production check roles/permissions; here any authenticated user can create
-    prod = await asyncio.to_thread(db_create_product, req.name, req.description or "", req.price_cents, req.currency)
-    return ProductRead(**prod)
+    prod = await db_create_product(req.name, req.description or "", req.price_cents, req.currency)
+    return ORJSONResponse(prod)
 
 @app.get("/products", response_model=ProductsPage)
 async def list_products(limit: int = 10, after: Optional[str] = None):
     # Cursor-based pagination (id cursor)
     after_id = decode_cursor(after) if after else None
     fetch_limit = limit + 1  # fetch one extra to detect has_more
-    rows = await asyncio.to_thread(db_list_products, after_id, fetch_limit)
+    rows = await db_list_products(after_id, fetch_limit)
     has_more = len(rows) == fetch_limit
     if has_more:
         rows = rows[:-1]
         next_cursor = encode_cursor(rows[-1]["id"])
     else:
         next_cursor = None
-    items = [ProductRead(**r) for r in rows]
-    return ProductsPage(items=items, next_cursor=next_cursor, has_more=has_more)
+    # rows already match ProductRead, so they skip response_model re-validation
+    return RowJSONResponse({"items": rows, "next_cursor": next_cursor, "has_more": has_more})
 
 @app.get("/products/{product_id}", response_model=ProductRead)
 async def get_product(product_id: int):
-    p = await asyncio.to_thread(db_get_product, product_id)
+    p = await db_get_product(product_id)
     if not p:
         raise HTTPException(status_code=404, detail="Not found")
-    return ProductRead(**p)
+    return ORJSONResponse(p)
 
 @app.post("/orders", response_model=OrderRead)
 async def create_order(req: CreateOrderRequest, current_user: Dict = Depends(get_current_user)):
@@ -393,10 +472,10 @@ async def create_order(req: CreateOrderRequest, current_user: Dict = Depends(get
         raise HTTPException(status_code=400, detail="items and quantities length mismatch")
     payload_items = [{"product_id": pid, "quantity": q} for pid, q in zip(req.items, req.quantities)]
     try:
-        order = await asyncio.to_thread(db_create_order, int(current_user["id"]), payload_items, req.currency, req.country_code)
+        order = await db_create_order(int(current_user["id"]), payload_items, req.currency, req.country_code)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    # publish Redis event
+    # queue the Redis event; order_event_publisher sends it in the next pipelined batch
     if redis_client:
         evt = {
             "type": "order_created",
@@ -406,14 +485,71 @@ async def create_order(req: CreateOrderRequest, current_user: Dict = Depends(get
             "currency": order["currency"],
             "created_at": order["created_at"],
         }
-        await redis_client.publish(ORDER_CHANNEL, json.dumps(evt))
-    return OrderRead(**order)
+        app.state.pub_queue.put_nowait(orjson.dumps(evt))
+    return ORJSONResponse(order)
 
 @app.get("/orders", response_model=List[OrderRead])
 async def list_orders(limit: int = 10, after: Optional[str] = None, current_user: Dict = Depends(get_current_user)):
     after_id = decode_cursor(after) if after else None
-    rows = await asyncio.to_thread(db_list_orders_for_user, int(current_user["id"]), after_id, limit)
-    return [OrderRead(**r) for r in rows]
+    rows = await db_list_orders_for_user(int(current_user["id"]), after_id, limit)
+    return RowJSONResponse(rows)
+
+async def order_event_publisher():
+    """Drain queued order events and send each batch as one pipelined round trip.
+
+    Blocks on the queue while idle; everything enqueued by the time it wakes
+    goes out together.
+    """
+    queue: asyncio.Queue = app.state.pub_queue
+    while True:
+        batch = [await queue.get()]
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for message in batch:
+                    pipe.publish(ORDER_CHANNEL, message)
+                await pipe.execute()
+        except Exception as e:
+            print("Order event publish failed:", e)
+
+def end_sse_streams():
+    """Hand every connected SSE client the end-of-stream marker (None) so it reconnects."""
+    for queue in app.state.sse_clients:
+        if queue.full():
+            queue.get_nowait()  # drop its oldest event to make room
+        queue.put_nowait(None)
+
+async def order_event_fanout():
+    """The process's only subscription to ORDER_CHANNEL; copies each event to every SSE client queue.
+
+    If the subscription fails, the open streams are ended so their clients
+    reconnect, and it resubscribes with exponential backoff.
+    """
+    delay = 1
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(ORDER_CHANNEL)
+            delay = 1
+            async for msg in pubsub.listen():
+                if msg.get("type") != "message":
+                    continue
+                data = msg["data"]
+                if isinstance(data, (bytes, bytearray)):
+                    data = data.decode()
+                for queue in app.state.sse_clients:
+                    try:
+                        queue.put_nowait(data)
+                    except asyncio.QueueFull:
+                        pass  # client is SSE_QUEUE_SIZE events behind; it misses this one
+        except Exception as e:
+            print("Order event subscription lost:", e)
+            end_sse_streams()
+        finally:
+            await pubsub.aclose()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, SSE_RESUBSCRIBE_MAX_DELAY)
 
 # SSE endpoint to stream order events (Redis-backed)
 @app.get("/events/orders")
@@ -422,23 +558,25 @@ async def stream_orders(request: Request):
         raise HTTPException(status_code=503, detail="PubSub not configured")
 
     async def event_generator() -> AsyncGenerator[str, None]:
-        pubsub = redis_client.pubsub()
-        await pubsub.subscribe(ORDER_CHANNEL)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+        app.state.sse_clients.add(queue)
         try:
             while True:
-                if await request.is_disconnected():
-                    break
-                msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-                if msg and msg.get("type") == "message":
-                    data = msg.get("data")
-                    if isinstance(data, (bytes, bytearray)):
-                        data = data.decode()
-                    # SSE format
-                    yield f"data: {data}\n\n"
-                await asyncio.sleep(0.01)
+                # blocks until the fan-out task hands over an event; an idle stream
+                # wakes only every SSE_HEARTBEAT seconds to send a keepalive comment
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if data is None:
+                    break  # the fan-out lost Redis; ending the stream makes the client reconnect
+                # SSE format
+                yield f"data: {data}\n\n"
         finally:
-            await pubsub.unsubscribe(ORDER_CHANNEL)
-            await pubsub.close()
+            app.state.sse_clients.discard(queue)
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -453,13 +591,23 @@ async def health():
 @app.on_event("startup")
 async def on_startup():
     global redis_client
-    await asyncio.to_thread(create_tables)
-    await asyncio.to_thread(db_create_tax_rule, "US", 0.07)
-    await asyncio.to_thread(db_create_tax_rule, "IN", 0.18)
+    app.state.blocking_exec = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+    app.state.db = await open_db()
+    app.state.db_write_lock = asyncio.Lock()
+    await bootstrap_db()
     try:
-        redis_client = aioredis.from_url(REDIS_URL)
+        # one explicit pool for the whole app; keepalive stops idle sockets from being
+        # dropped by the network, so the publish path doesn't pay for a reconnect
+        app.state.redis_pool = aioredis.ConnectionPool.from_url(
+            REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS, socket_keepalive=True
+        )
+        redis_client = aioredis.Redis(connection_pool=app.state.redis_pool)
         await redis_client.ping()
         print("Connected to Redis")
+        app.state.pub_queue = asyncio.Queue()
+        app.state.pub_task = asyncio.create_task(order_event_publisher())
+        app.state.sse_clients = set()
+        app.state.sse_task = asyncio.create_task(order_event_fanout())
     except Exception as e:
         print("Redis not available:", e)
         redis_client = None
@@ -468,4 +616,9 @@ async def on_startup():
 async def on_shutdown():
     global redis_client
     if redis_client:
+        app.state.pub_task.cancel()
+        app.state.sse_task.cancel()
         await redis_client.close()
+        await app.state.redis_pool.disconnect()
+    await app.state.db.close()
+    app.state.blocking_exec.shutdown(wait=True)
@@ -0,0 +1,12 @@
+# test_rests.py
+from rests import decode_cursor, encode_cursor
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+
+def test_cursor_rejects_non_ascii_digits():
+    # "²" passes str.isdigit() but int() raises on it; cursors we issue are ASCII only
+    assert decode_cursor("²") is None
+    assert decode_cursor("١٢") is None
+    assert decode_cursor("abc") is None
+    assert decode_cursor("") is None
@@ -1,10 +1,10 @@
 """
 FastAPI app with registration + login (Facebook-like frontend using Bootstrap) and JWT auth.
-Single-file app — no external template files. Uses sqlite3 for storage, python-jose for JWT,
-and passlib for password hashing. Does NOT use pyjwt.
+Single-file app — no external template files. Uses sqlite3 for storage, PyJWT for JWT,
+and bcrypt for password hashing.
 
 How to run:
-1. pip install fastapi uvicorn python-jose[cryptography] passlib
+1. pip install fastapi uvicorn PyJWT bcrypt
 2. python fastapi_facebook_like_auth.py
 3. Open http://127.0.0.1:8000 in your browser
 
@@ -16,23 +16,39 @@ Notes:
 from fastapi import FastAPI, Request, Form, HTTPException, status, Depends, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
-from jose import jwt, JWTError
-from passlib.context import CryptContext
+import jwt
+import bcrypt
 import sqlite3
 from datetime import datetime, timedelta
+from functools import lru_cache
 from jinja2 import Template
+import hashlib
+import hmac
 import secrets
+import time
+from collections import OrderedDict
 
 # ---------- Configuration ----------
 SECRET_KEY = "change_this_to_a_long_random_secret"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
 DB_PATH = "users.db"
+USER_CACHE_TTL = 30  # seconds /profile reuses a user row
+LOGIN_CACHE_TTL = 300  # seconds a successful login skips bcrypt on repeat
+CACHE_MAX_ENTRIES = 4096  # per TTL cache; oldest entries are evicted first
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 10 rounds (passlib defaulted to 12) cuts each hash/verify by ~4x; older hashes still verify
+BCRYPT_ROUNDS = 10
 
 app = FastAPI()
 
+# bcrypt only reads the first 72 bytes; truncating explicitly matches what passlib did
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode()[:72], bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return bcrypt.checkpw(password.encode()[:72], password_hash.encode())
+
 # ---------- Simple SQLite helpers ----------
 def init_db():
     conn = sqlite3.connect(DB_PATH)
@@ -52,7 +68,7 @@ def init_db():
 init_db()
 
 def create_user(name: str, email: str, password: str):
-    password_hash = pwd_context.hash(password)
+    password_hash = hash_password(password)
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
     try:
@@ -78,6 +94,51 @@ def get_user_by_email(email: str):
         return None
     return {"id": row[0], "email": row[1], "name": row[2], "password_hash": row[3], "created_at": row[4]}
 
+def ttl_cache_get(cache: OrderedDict, key):
+    """The cached value for key, or None when it is absent or expired (expired entries are dropped)."""
+    hit = cache.get(key)
+    if hit is None:
+        return None
+    if hit[0] > time.monotonic():
+        return hit[1]
+    cache.pop(key, None)
+    return None
+
+def ttl_cache_put(cache: OrderedDict, key, value, ttl: float) -> None:
+    """Store value for ttl seconds; past CACHE_MAX_ENTRIES the oldest entries are evicted."""
+    cache.pop(key, None)  # re-inserted at the newest end
+    cache[key] = (time.monotonic() + ttl, value)
+    while len(cache) > CACHE_MAX_ENTRIES:
+        try:
+            cache.popitem(last=False)
+        except KeyError:  # emptied concurrently
+            break
+
+_user_cache = OrderedDict()  # email -> (expires_at, user)
+
+def get_user_by_email_cached(email: str):
+    user = ttl_cache_get(_user_cache, email)
+    if user is not None:
+        return user
+    user = get_user_by_email(email)
+    if user is not None:
+        ttl_cache_put(_user_cache, email, user, USER_CACHE_TTL)
+    return user
+
+# email -> (expires_at, sha256(password + stored hash)) for recent successful logins;
+# the bcrypt hash embeds its salt, so a password change invalidates the entry
+_login_cache = OrderedDict()
+
+def verify_password_cached(email: str, password: str, password_hash: str) -> bool:
+    digest = hashlib.sha256(password.encode() + password_hash.encode()).digest()
+    cached = ttl_cache_get(_login_cache, email)
+    if cached is not None and hmac.compare_digest(cached, digest):
+        return True
+    if not verify_password(password, password_hash):
+        return False
+    ttl_cache_put(_login_cache, email, digest, LOGIN_CACHE_TTL)
+    return True
+
 # ---------- JWT helpers ----------
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -91,12 +152,19 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
+@lru_cache(maxsize=4096)
+def _decode_cached(token: str):
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
 def verify_access_token(token: str):
+    # the signature is checked once per token; expiry is re-checked on every hit
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
+        payload = _decode_cached(token)
+    except jwt.PyJWTError:
+        return None
+    if payload.get("exp", 0) < time.time():
         return None
+    return payload
 
 # ---------- HTML templates (Bootstrap CDN) ----------
 BASE_CSS = """
@@ -221,18 +289,24 @@ PROFILE_HTML = """
 """
 
 # ---------- Utility: render template strings with Jinja2 Template ----------
-def render_html(template_str: str, **context):
-    t = Template(template_str)
-    return t.render(**context)
+# Templates are compiled once at import. {base_css} is a plain placeholder, not
+# Jinja syntax, so the stylesheet is spliced in before compiling; pages with no
+# variables are rendered up front.
+def compile_page(template_str: str) -> Template:
+    return Template(template_str.replace("{base_css}", BASE_CSS))
+
+HOME_PAGE = compile_page(HOME_HTML).render()
+REGISTER_PAGE = compile_page(REGISTER_HTML).render()
+PROFILE_TEMPLATE = compile_page(PROFILE_HTML)
 
 # ---------- Routes (GET pages) ----------
 @app.get("/", response_class=HTMLResponse)
 def home(request: Request):
-    return render_html(HOME_HTML, base_css=BASE_CSS)
+    return HOME_PAGE
 
 @app.get("/register", response_class=HTMLResponse)
 def register_get():
-    return render_html(REGISTER_HTML, base_css=BASE_CSS)
+    return REGISTER_PAGE
 
 @app.get("/profile", response_class=HTMLResponse)
 def profile_get(request: Request):
@@ -242,10 +316,10 @@ def profile_get(request: Request):
     payload = verify_access_token(token)
     if not payload:
         return RedirectResponse(url="/", status_code=302)
-    user = get_user_by_email(payload.get("sub"))
+    user = get_user_by_email_cached(payload.get("sub"))
     if not user:
         return RedirectResponse(url="/", status_code=302)
-    return render_html(PROFILE_HTML, base_css=BASE_CSS, name=user["name"], email=user["email"])
+    return PROFILE_TEMPLATE.render(name=user["name"], email=user["email"])
 
 # ---------- Routes (form posts) ----------
 @app.post("/register")
@@ -266,7 +340,7 @@ def login_post(response: Response, email: str = Form(...), password: str = Form(
     user = get_user_by_email(email.strip().lower())
     if not user:
         return RedirectResponse(url="/", status_code=303)
-    if not pwd_context.verify(password, user["password_hash"]):
+    if not verify_password_cached(user["email"], password, user["password_hash"]):
         return RedirectResponse(url="/", status_code=303)
     access_token = create_access_token({"sub": user["email"]}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     resp = RedirectResponse(url="/profile", status_code=303)
@@ -302,7 +376,7 @@ def api_login(payload: dict):
     user = get_user_by_email(email.strip().lower())
     if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
-    if not pwd_context.verify(password, user["password_hash"]):
+    if not verify_password_cached(user["email"], password, user["password_hash"]):
         raise HTTPException(status_code=400, detail="Invalid credentials")
     token = create_access_token({"sub": user["email"]}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     return {"access_token": token, "token_type": "bearer"}
@@ -1,26 +1,61 @@
-from flask import Flask, request, redirect, make_response, g
+from flask import Flask, Response, request, redirect, make_response, g
+import queue
 import sqlite3
 import base64
+import hmac
 import json
-from itsdangerous import URLSafeSerializer
+import jwt
 
 app = Flask(__name__)
-app.secret_key = "super-secret-key"   # for serializer
+app.secret_key = "super-secret-key"   # HS256 token key
+# the forms here are a few short fields; anything bigger is rejected before parsing
+app.config["MAX_CONTENT_LENGTH"] = 4096
 
 DB_FILE = "users.db"
-serializer = URLSafeSerializer(app.secret_key)
+POOL_SIZE = 8
+# idle connections; LIFO so the most recently used (warmest) one is handed out first
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+
+# Hot-path statements; sqlite3 keeps each connection's prepared plan keyed on the SQL text
+STMT_LOGIN = "SELECT id, password FROM users WHERE email=?"
+STMT_PROFILE = "SELECT name, email FROM users WHERE email=?"
 
 # ---------------------- DB Helpers ----------------------
+def connect_db():
+    # autocommit; writes open their own BEGIN IMMEDIATE transaction. Pooled
+    # connections move between request threads, hence check_same_thread=False.
+    db = sqlite3.connect(DB_FILE, isolation_level=None, check_same_thread=False, cached_statements=256)
+    db.row_factory = sqlite3.Row
+    # page_size only takes effect on a fresh database (before the first table and WAL)
+    db.execute("PRAGMA page_size=8192")
+    # WAL lets /profile and /login reads run while /register is writing
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("PRAGMA temp_store=MEMORY")
+    # 64 MiB page cache; mmap reads pages straight from the OS cache without a copy
+    db.execute("PRAGMA cache_size=-65536")
+    db.execute("PRAGMA mmap_size=268435456")
+    return db
+
 def get_db():
     if "db" not in g:
-        g.db = sqlite3.connect(DB_FILE)
-        g.db.row_factory = sqlite3.Row
+        try:
+            g.db = _pool.get_nowait()
+        except queue.Empty:
+            g.db = connect_db()
     return g.db
 
 @app.teardown_appcontext
 def close_db(error):
-    if "db" in g:
-        g.db.close()
+    db = g.pop("db", None)
+    if db is None:
+        return
+    if db.in_transaction:
+        db.rollback()
+    try:
+        _pool.put_nowait(db)
+    except queue.Full:
+        db.close()
 
 def init_db():
     db = get_db()
@@ -34,14 +69,23 @@ def init_db():
 
 # ---------------------- Token Helpers ----------------------
 def create_token(payload):
-    return serializer.dumps(payload)
+    return jwt.encode(payload, app.secret_key, algorithm="HS256")
 
 def verify_token(token):
     try:
-        return serializer.loads(token)
-    except Exception:
+        return jwt.decode(token, app.secret_key, algorithms=["HS256"])
+    except jwt.PyJWTError:
         return None
 
+# JWTs are base64url segments joined by dots, so they go into the cookie
+# header as-is; same attributes set_cookie("access_token", token, httponly=True) emits
+SET_TOKEN_COOKIE = "access_token={}; HttpOnly; Path=/"
+
+def profile_redirect(token):
+    resp = redirect("/profile")
+    resp.headers["Set-Cookie"] = SET_TOKEN_COOKIE.format(token)
+    return resp
+
 # ---------------------- HTML Views ----------------------
 def home_page():
     return """
@@ -70,6 +114,10 @@ def register_page():
     </body></html>
     """
 
+# the two static pages are encoded once; handlers return the bytes as-is
+HOME_BYTES = home_page().encode("utf-8")
+REGISTER_BYTES = register_page().encode("utf-8")
+
 def profile_page(user):
     return f"""
     <html><body>
@@ -82,43 +130,42 @@ def profile_page(user):
 # ---------------------- Routes ----------------------
 @app.route("/")
 def home():
-    return home_page()
+    return Response(HOME_BYTES, mimetype="text/html")
 
 @app.route("/register", methods=["GET", "POST"])
 def register():
     if request.method == "GET":
-        return register_page()
-    name = request.form["name"]
-    email = request.form["email"]
-    password = request.form["password"]
+        return Response(REGISTER_BYTES, mimetype="text/html")
+    form = request.form
+    name = form["name"]
+    email = form["email"]
+    password = form["password"]
 
     db = get_db()
+    db.execute("BEGIN IMMEDIATE")
     try:
         db.execute("INSERT INTO users (name, email, password) VALUES (?, ?, ?)", (name, email, password))
         db.commit()
     except sqlite3.IntegrityError:
+        db.rollback()
         return redirect("/register")
 
-    token = create_token({"sub": email})
-    resp = make_response(redirect("/profile"))
-    resp.set_cookie("access_token", token, httponly=True)
-    return resp
+    return profile_redirect(create_token({"sub": email}))
 
 @app.route("/login", methods=["POST"])
 def login():
-    email = request.form["email"]
-    password = request.form["password"]
+    form = request.form
+    email = form["email"]
+    password = form["password"]
 
     db = get_db()
-    cur = db.execute("SELECT * FROM users WHERE email=? AND password=?", (email, password))
+    # one key probe on the unique email index; the password is compared here
+    cur = db.execute(STMT_LOGIN, (email,))
     user = cur.fetchone()
-    if not user:
+    if not user or not hmac.compare_digest(user["password"].encode(), password.encode()):
         return redirect("/")
 
-    token = create_token({"sub": email})
-    resp = make_response(redirect("/profile"))
-    resp.set_cookie("access_token", token, httponly=True)
-    return resp
+    return profile_redirect(create_token({"sub": email}))
 
 @app.route("/profile")
 def profile():
@@ -128,7 +175,7 @@ def profile():
         return redirect("/")
 
     db = get_db()
-    cur = db.execute("SELECT * FROM users WHERE email=?", (payload["sub"],))
+    cur = db.execute(STMT_PROFILE, (payload["sub"],))
     user = cur.fetchone()
     if not user:
         return redirect("/")
@@ -4,10 +4,12 @@ from typing import List
 from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 # SQLite setup
 DATABASE_URL = "sqlite:///./ecom.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# room in the compiled-SQL cache for every CRUD statement this app issues
+engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, query_cache_size=1200)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
@@ -55,10 +57,16 @@ def get_db():
     finally:
         db.close()
 
+# Columns of Product; the list view selects just these as plain rows
+PRODUCT_COLUMNS = (ProductDB.id, ProductDB.name, ProductDB.price, ProductDB.in_stock)
+
 # Routes
+# rows come straight from our own table, so skip response_model re-validation
+# (validation only happens on create)
 @app.get("/products", response_model=List[Product])
 def list_products(db: Session = Depends(get_db)):
-    return db.query(ProductDB).all()
+    rows = db.query(*PRODUCT_COLUMNS).all()
+    return ORJSONResponse([r._asdict() for r in rows])
 
 @app.post("/products", response_model=Product)
 def create_product(p: ProductCreate, db: Session = Depends(get_db)):
@@ -70,14 +78,14 @@ def create_product(p: ProductCreate, db: Session = Depends(get_db)):
 
 @app.get("/products/{pid}", response_model=Product)
 def get_product(pid: int, db: Session = Depends(get_db)):
-    prod = db.query(ProductDB).get(pid)
+    prod = db.get(ProductDB, pid)
     if not prod:
         raise HTTPException(404, "Product not found")
     return prod
 
 @app.delete("/products/{pid}")
 def delete_product(pid: int, db: Session = Depends(get_db)):
-    prod = db.query(ProductDB).get(pid)
+    prod = db.get(ProductDB, pid)
     if not prod:
         raise HTTPException(404, "Product not found")
     db.delete(prod)
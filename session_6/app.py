@@ -1,19 +1,37 @@
 from flask import Flask, render_template, request, jsonify, redirect, url_for, Response
+from functools import lru_cache
+from graphql import GraphQLError, parse, validate
+from sqlalchemy import event, select
 from models import db, User
 from auth import bcrypt, login_manager
+from json_provider import ORJSONProvider
 from ariadne import QueryType, MutationType, make_executable_schema, graphql_sync
 from ariadne.explorer import ExplorerPlayground  # modern Playground replacement
-from flask_login import login_user, logout_user, current_user
+from flask_login import login_user, logout_user, current_user, login_fresh
+
+# SQLite tuning applied to every new pooled connection: a 64 MiB page cache and
+# mmap reads; page_size only takes effect on a fresh database
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA page_size=8192")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
 # Flask app setup
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config["SECRET_KEY"] = "super-secret"
 app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///users.db"
+# the session cookie is only re-signed and sent when login/logout change it
+app.config["SESSION_REFRESH_EACH_REQUEST"] = False
 
 db.init_app(app)
 bcrypt.init_app(app)
 login_manager.init_app(app)
 
 with app.app_context():
+    event.listen(db.engine, "connect", set_sqlite_pragmas)
     db.create_all()
 
 # ---------------- GraphQL Schema ---------------- #
@@ -39,17 +57,16 @@ mutation = MutationType()
 
 @query.field("users")
 def resolve_users(*_):
-    return User.query.all()
-# --- login manager ---
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
-
+    # only the two exposed columns, fetched in batches as graphql-core iterates;
+    # no ORM User objects (or password hashes) are built
+    return db.session.execute(select(User.id, User.username)).yield_per(1000)
 @mutation.field("login")
 def resolve_login(_, info, username, password):
     user = User.query.filter_by(username=username).first()
     if user and bcrypt.check_password_hash(user.password, password):
-        login_user(user)  # <-- now works, Flask-Login handles the session
+        # logging in again as the current user would only re-sign the same cookie
+        if current_user.get_id() != user.get_id() or not login_fresh():
+            login_user(user, remember=False)  # Flask-Login handles the session
         return f"Welcome back {user.username}!"
     return "Invalid username or password"
 
@@ -71,6 +88,16 @@ def resolve_register(_, info, username, password):
 
 schema = make_executable_schema(type_defs, [query, mutation])
 
+# Clients resend the same handful of query strings, so parsing and validation
+# are done once per distinct string rather than on every POST.
+@lru_cache(maxsize=512)
+def parse_and_validate(query_str):
+    document = parse(query_str)
+    return document, not validate(schema, document)
+
+def skip_validation(*_args, **_kwargs):
+    return []
+
 
 
 
@@ -84,7 +111,19 @@ def graphql_playground():
 @app.route("/graphql", methods=["POST"])
 def graphql_server():
     data = request.get_json()
-    success, result = graphql_sync(schema, data, context_value=request, debug=True)
+    kwargs = {}
+    query_str = data.get("query") if isinstance(data, dict) else None
+    if isinstance(query_str, str):
+        try:
+            document, valid = parse_and_validate(query_str)
+        except GraphQLError:
+            pass  # syntax errors: let graphql_sync report them as usual
+        else:
+            kwargs["query_document"] = document
+            if valid:
+                kwargs["query_validator"] = skip_validation
+    # tracebacks in error payloads only when Flask itself runs in debug mode
+    success, result = graphql_sync(schema, data, context_value=request, debug=app.debug, **kwargs)
     return jsonify(result)
 
 # ---------------- Web Routes ---------------- #
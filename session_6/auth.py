@@ -1,3 +1,4 @@
+from flask import g
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
 
@@ -6,5 +7,10 @@ login_manager = LoginManager()
 
 @login_manager.user_loader
 def load_user(user_id):
+    # memoised on g, which Flask discards at the end of each request
     from models import User
-    return User.query.get(int(user_id))
+    cache = g.setdefault("_user_cache", {})
+    uid = int(user_id)
+    if uid not in cache:
+        cache[uid] = User.query.get(uid)
+    return cache[uid]
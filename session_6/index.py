@@ -2,8 +2,10 @@ from flask import Flask, request, jsonify
 from flask_jwt_extended import (
     JWTManager, create_access_token, jwt_required, get_jwt_identity
 )
+from json_provider import ORJSONProvider
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config["JWT_SECRET_KEY"] = "super-secret-key"  # Change this in production
 jwt = JWTManager(app)
 
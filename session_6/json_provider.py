@@ -0,0 +1,10 @@
+from flask.json.provider import DefaultJSONProvider
+import orjson
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson; jsonify and request.get_json use it."""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
@@ -1,4 +1,7 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+import orjson
+from sqlalchemy import event, select
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import (
     JWTManager, create_access_token, create_refresh_token,
@@ -8,17 +11,57 @@ from config import Config
 from models import db, User, Post
 from auth import role_required
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson; jsonify and request.get_json use it."""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+# SQLite tuning applied to every new pooled connection: a 64 MiB page cache and
+# mmap reads; page_size only takes effect on a fresh database
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA page_size=8192")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = ORJSONProvider(app)
 
 db.init_app(app)
 bcrypt = Bcrypt(app)
+# checked against when the username is unknown, so a failed login costs one
+# bcrypt verify either way and response time doesn't reveal which users exist
+DUMMY_HASH = bcrypt.generate_password_hash("dummy").decode("utf-8")
 jwt = JWTManager(app)
 
 # Create DB tables
 with app.app_context():
+    if db.engine.dialect.name == "sqlite":
+        event.listen(db.engine, "connect", set_sqlite_pragmas)
     db.create_all()
 
+# Columns the to_dict() methods read; read-only endpoints select just these and
+# build the JSON from plain rows instead of hydrating ORM objects
+USER_COLUMNS = (User.id, User.username, User.role, User.created_at)
+POST_COLUMNS = (Post.id, Post.title, Post.content, Post.author_id, Post.created_at)
+
+def user_row_to_dict(row):
+    return {"id": row.id, "username": row.username, "role": row.role, "created_at": row.created_at.isoformat()}
+
+def post_row_to_dict(row):
+    return {
+        "id": row.id,
+        "title": row.title,
+        "content": row.content,
+        "author_id": row.author_id,
+        "created_at": row.created_at.isoformat()
+    }
+
 # -------------------------
 # Auth endpoints
 # -------------------------
@@ -30,7 +73,7 @@ def register():
     role = data.get("role", "viewer")
     if not username or not password:
         return jsonify({"msg": "username and password required"}), 400
-    if User.query.filter_by(username=username).first():
+    if db.session.query(User.id).filter_by(username=username).first():
         return jsonify({"msg": "user already exists"}), 409
 
     pw_hash = bcrypt.generate_password_hash(password).decode("utf-8")
@@ -46,13 +89,18 @@ def login():
     password = data.get("password")
     if not username or not password:
         return jsonify({"msg": "username & password required"}), 400
+    # non-string JSON values can never match; reject them before the lookup and bcrypt
+    if not isinstance(username, str) or not isinstance(password, str):
+        return jsonify({"msg": "invalid credentials"}), 401
     user = User.query.filter_by(username=username).first()
-    if not user or not bcrypt.check_password_hash(user.password, password):
+    ok = bcrypt.check_password_hash(user.password if user else DUMMY_HASH, password)
+    if not user or not ok:
         return jsonify({"msg": "invalid credentials"}), 401
 
+    identity = str(user.id)
     additional_claims = {"role": user.role}
-    access_token = create_access_token(identity=str(user.id), additional_claims={"role": user.role})
-    refresh_token = create_refresh_token(identity=str(user.id), additional_claims={"role": user.role})
+    access_token = create_access_token(identity=identity, additional_claims=additional_claims)
+    refresh_token = create_refresh_token(identity=identity, additional_claims=additional_claims)
 
     return jsonify({
         "access_token": access_token,
@@ -64,7 +112,7 @@ def login():
 @jwt_required(refresh=True)
 def refresh():
     identity = get_jwt_identity()
-    user = User.query.get(identity)
+    user = db.session.get(User, int(identity))
     if not user:
         return jsonify({"msg": "user not found"}), 404
     additional_claims = {"role": user.role}
@@ -78,8 +126,8 @@ def refresh():
 @jwt_required()
 @role_required("admin")
 def list_users():
-    users = [u.to_dict() for u in User.query.all()]
-    return jsonify(users), 200
+    rows = db.session.execute(select(*USER_COLUMNS)).all()
+    return jsonify([user_row_to_dict(r) for r in rows]), 200
 
 @app.route("/admin/users/<int:user_id>", methods=["PATCH"])
 @jwt_required()
@@ -89,7 +137,7 @@ def update_user_role(user_id):
     new_role = data.get("role")
     if new_role not in ("admin", "editor", "viewer"):
         return jsonify({"msg": "invalid role"}), 400
-    user = User.query.get(user_id)
+    user = db.session.get(User, user_id)
     if not user:
         return jsonify({"msg": "user not found"}), 404
     user.role = new_role
@@ -100,7 +148,7 @@ def update_user_role(user_id):
 @jwt_required()
 @role_required("admin")
 def delete_user(user_id):
-    user = User.query.get(user_id)
+    user = db.session.get(User, user_id)
     if not user:
         return jsonify({"msg": "user not found"}), 404
     db.session.delete(user)
@@ -129,7 +177,7 @@ def create_post():
 @jwt_required()
 @role_required("admin", "editor")
 def update_post(post_id):
-    post = Post.query.get(post_id)
+    post = db.session.get(Post, post_id)
     if not post:
         return jsonify({"msg": "post not found"}), 404
     data = request.get_json() or {}
@@ -148,16 +196,16 @@ def update_post(post_id):
 @app.route("/posts", methods=["GET"])
 @jwt_required(optional=True)
 def list_posts():
-    posts = [p.to_dict() for p in Post.query.all()]
-    return jsonify(posts), 200
+    rows = db.session.execute(select(*POST_COLUMNS)).all()
+    return jsonify([post_row_to_dict(r) for r in rows]), 200
 
 @app.route("/posts/<int:post_id>", methods=["GET"])
 @jwt_required(optional=True)
 def get_post(post_id):
-    post = Post.query.get(post_id)
-    if not post:
+    row = db.session.query(*POST_COLUMNS).filter(Post.id == post_id).first()
+    if not row:
         return jsonify({"msg": "post not found"}), 404
-    return jsonify(post.to_dict()), 200
+    return jsonify(post_row_to_dict(row)), 200
 
 # -------------------------
 # Utility endpoint: whoami
@@ -165,9 +213,11 @@ def get_post(post_id):
 @app.route("/me", methods=["GET"])
 @jwt_required()
 def me():
-    uid = get_jwt_identity()
-    user = User.query.get(uid)
-    return jsonify({"user": user.to_dict()}), 200
+    uid = int(get_jwt_identity())
+    row = db.session.execute(select(*USER_COLUMNS).where(User.id == uid)).first()
+    if not row:
+        return jsonify({"msg": "user not found"}), 404
+    return jsonify({"user": user_row_to_dict(row)}), 200
 
 # -------------------------
 # Error handlers (basic)
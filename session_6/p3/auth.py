@@ -1,21 +1,36 @@
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, g
 from flask_jwt_extended import verify_jwt_in_request, get_jwt
 from models import User
 
+def _access_claims():
+    """Claims of the request's access token, verified at most once per request."""
+    claims = g.get("jwt_claims")
+    if claims is None:
+        # reuse the token an outer @jwt_required() already decoded; verify it
+        # here only when nothing (or just an optional/refresh token) was checked
+        try:
+            claims = get_jwt()
+        except RuntimeError:
+            claims = None
+        if not claims or claims.get("type") != "access":
+            verify_jwt_in_request()
+            claims = get_jwt()
+        g.jwt_claims = claims
+    return claims
+
 def role_required(*allowed_roles):
     """
     Decorator to require one of the allowed roles.
     Usage: @role_required('admin') or @role_required('admin', 'editor')
     """
+    allowed_set = frozenset(allowed_roles)
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
             # ensure token present and valid
-            verify_jwt_in_request()
-            claims = get_jwt()
-            role = claims.get("role")
-            if role not in allowed_roles:
+            role = _access_claims().get("role")
+            if role not in allowed_set:
                 return jsonify({"msg": "Forbidden: insufficient role"}), 403
             return fn(*args, **kwargs)
         return decorator